@@ -0,0 +1,279 @@
+import argparse, asyncio, hashlib, json, math, os, re
+from collections import defaultdict
+from PIL import Image
+
+from fetch_engine import add_engine_arguments, engine_from_args
+from metrics import span
+from pokedex_stream import JsonlWriter, index_jsonl, iter_entries, read_entries_at
+from silhouette_store import SILHOUETTE_DIR
+
+ATLAS_DIR = "atlas"
+ATLAS_MANIFEST = "atlas.json"
+SPRITE_DIR = "sprites"
+MAX_SHEET = 2048
+PADDING = 1  # transparent pixels between frames so filtering never bleeds into a neighbour
+KINDS = ("silhouette", "sprite")
+SHEET_MODES = {"silhouette": "LA", "sprite": "RGBA"}  # silhouettes are black + alpha: half the bytes to encode
+
+
+def parse_sizes(text):
+    # "0,128" -> [0, 128]; 0 = original size, N = longest side of the untrimmed image scaled to N px
+    return sorted({int(part) for part in text.split(",") if part.strip()})
+
+
+def group_key(entry, by_generation):
+    if not by_generation:
+        return "all"
+    match = re.search(r"\d+", str(entry.get("generation", "")))
+    return f"gen{match.group()}" if match else "other"
+
+
+def silhouette_source(entry, silhouette_dir=SILHOUETTE_DIR):
+    if entry.get("silhouette"):
+        return entry["silhouette"]
+    if entry.get("silhouette_url"):
+        return os.path.join(silhouette_dir, os.path.basename(entry["silhouette_url"]))
+    return None
+
+
+def sprite_url(entry):
+    return entry.get("sprite") or entry.get("sprite_url")
+
+
+def sprite_file(entry, sprite_dir=SPRITE_DIR):
+    return os.path.join(sprite_dir, f"{entry['id']}.png")
+
+
+# === SPRITE MIRROR ===
+# One local copy per entry (sprites/<id>.png), fetched only when missing, so the
+# packer runs offline once the mirror is warm.
+async def mirror_sprites(engine, entries, sprite_dir=SPRITE_DIR, window=20):
+    os.makedirs(sprite_dir, exist_ok=True)
+    slots = asyncio.Semaphore(window)
+    todo = [(sprite_file(e, sprite_dir), sprite_url(e)) for e in entries
+            if sprite_url(e) and not os.path.exists(sprite_file(e, sprite_dir))]
+
+    async def fetch(path, url):
+        async with slots:
+            body = await engine.fetch_bytes(url)
+        if body:
+            with open(path + ".tmp", "wb") as f:
+                f.write(body)
+            os.replace(path + ".tmp", path)
+        return bool(body)
+
+    fetched = await asyncio.gather(*(fetch(path, url) for path, url in todo))
+    print(f"🪞 Sprite mirror: {sum(fetched)} downloaded, {len(todo) - sum(fetched)} failed, "
+          f"{len(entries) - len(todo)} already local in {sprite_dir}/")
+
+
+# === FRAMES ===
+# A frame is a source image with its transparent border trimmed; the offset and
+# untrimmed size are kept so clients can place it exactly like the original.
+# Byte-identical sources (forms sharing artwork) become a single frame.
+class Frame:
+    __slots__ = ("path", "box", "source", "size", "scale")
+
+    def __init__(self, path, box, source, target):
+        self.path = path
+        self.box = box  # trimmed region in the source image
+        self.source = source  # untrimmed (width, height)
+        self.scale = min(1.0, target / max(source)) if target else 1.0
+        w, h = box[2] - box[0], box[3] - box[1]
+        self.size = (max(1, round(w * self.scale)), max(1, round(h * self.scale)))
+
+    def image(self, mode="RGBA"):
+        with Image.open(self.path) as img:
+            img = img.convert(mode).crop(self.box)
+        return img if self.scale == 1.0 else img.resize(self.size, Image.LANCZOS)
+
+
+def measure(path):
+    # (trim box, untrimmed size) or None for a missing/empty image
+    try:
+        with Image.open(path) as img:
+            img = img.convert("RGBA")
+            box = img.getchannel("A").getbbox()
+            return (box, img.size) if box else None
+    except (OSError, ValueError):
+        return None
+
+
+# === SHELF PACKING ===
+# Frames sorted by height fill rows left to right; a row that no longer fits
+# opens a new shelf, a shelf that no longer fits opens a new sheet. The sheet
+# width targets a roughly square sheet for the frames it holds.
+def pack(frames, max_size=MAX_SHEET, padding=PADDING):
+    # frames: {key: Frame} -> ([(width, height) per sheet], {key: (sheet, x, y)})
+    if not frames:
+        return [], {}
+    area = sum((w + padding) * (h + padding) for w, h in (f.size for f in frames.values()))
+    widest = max(f.size[0] for f in frames.values()) + padding
+    width = min(max_size, max(widest, math.ceil(math.sqrt(area) * 1.05)))
+    sheets, placements = [], {}
+    x = y = shelf = used_w = 0
+    for key, frame in sorted(frames.items(), key=lambda item: (-item[1].size[1], item[0])):
+        w, h = frame.size
+        if x + w > width:
+            x, y, shelf = 0, y + shelf + padding, 0
+        if y + h > max_size:
+            sheets.append((used_w, y + shelf))
+            x = y = shelf = used_w = 0
+        placements[key] = (len(sheets), x, y)
+        x += w + padding
+        shelf = max(shelf, h)
+        used_w = max(used_w, x - padding)
+    sheets.append((used_w, y + shelf))
+    return sheets, placements
+
+
+# === ATLAS BUILD ===
+# For every kind (silhouette, sprite) x group (all / per generation) x size
+# variant, packs the frames into sheets named <kind>-<group>-<size>-<n>.png
+# and records every entry's rectangle in atlas.json:
+#   frames[kind][size][id] = {sheet, x, y, w, h, offset: [ox, oy], source: [W, H]}
+# where offset/source are in the variant's scale.
+def build_atlas(entries, out_dir=ATLAS_DIR, sizes=(0,), by_generation=False, kinds=KINDS,
+                silhouette_dir=SILHOUETTE_DIR, sprite_dir=SPRITE_DIR, max_size=MAX_SHEET):
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {"version": 1, "sheets": {}, "frames": {}}
+    measured, missing = {}, defaultdict(int)
+    sources = {"silhouette": lambda e: silhouette_source(e, silhouette_dir),
+               "sprite": lambda e: sprite_file(e, sprite_dir)}
+    for kind in kinds:
+        # content hash -> (path, measure); entry id -> content hash
+        by_hash, members = {}, defaultdict(dict)
+        for entry in entries:
+            path = sources[kind](entry)
+            if not path or not os.path.exists(path):
+                missing[kind] += 1
+                continue
+            with open(path, "rb") as f:
+                digest = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+            if digest not in by_hash:
+                if path not in measured:
+                    measured[path] = measure(path)
+                by_hash[digest] = (path, measured[path])
+            if by_hash[digest][1]:
+                members[group_key(entry, by_generation)][str(entry["id"])] = digest
+
+        for size in sizes:
+            variant = str(size) if size else "full"
+            frames_out = manifest["frames"].setdefault(kind, {}).setdefault(variant, {})
+            for group, ids in sorted(members.items()):
+                frames = {}
+                for digest in sorted(set(ids.values())):
+                    path, (box, source) = by_hash[digest]
+                    frames[digest] = Frame(path, box, source, size)
+                with span("atlas_pack", kind=kind):
+                    sheets, placements = pack(frames, max_size)
+                names = [f"{kind}-{group}-{variant}-{n}" for n in range(len(sheets))]
+                with span("atlas_render", kind=kind):
+                    for n, (w, h) in enumerate(sheets):
+                        canvas = Image.new(SHEET_MODES[kind], (max(1, w), max(1, h)))
+                        for digest, (sheet, x, y) in placements.items():
+                            if sheet == n:
+                                canvas.paste(frames[digest].image(SHEET_MODES[kind]), (x, y))
+                        canvas.save(os.path.join(out_dir, names[n] + ".png"), compress_level=6)
+                        manifest["sheets"][names[n]] = {"file": names[n] + ".png", "width": w, "height": h}
+                for entry_id, digest in ids.items():
+                    frame, (sheet, x, y) = frames[digest], placements[digest]
+                    frames_out[entry_id] = {
+                        "sheet": names[sheet], "x": x, "y": y, "w": frame.size[0], "h": frame.size[1],
+                        "offset": [round(frame.box[0] * frame.scale), round(frame.box[1] * frame.scale)],
+                        "source": [round(frame.source[0] * frame.scale), round(frame.source[1] * frame.scale)],
+                    }
+
+    path = os.path.join(out_dir, ATLAS_MANIFEST)
+    if os.path.exists(path):
+        # drop sheets of the previous layout that this one no longer uses
+        with open(path, "r", encoding="utf-8") as f:
+            stale = set(json.load(f).get("sheets", {})) - set(manifest["sheets"])
+        for name in stale:
+            if os.path.exists(os.path.join(out_dir, name + ".png")):
+                os.remove(os.path.join(out_dir, name + ".png"))
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+    frames = {kind: len(manifest["frames"].get(kind, {}).get("full" if 0 in sizes else str(sizes[0]), {}))
+              for kind in kinds}
+    print(f"🗺️ Atlas: {len(manifest['sheets'])} sheets in {out_dir}/ for "
+          + ", ".join(f"{n} {kind}s" for kind, n in frames.items())
+          + "".join(f" ({n} {kind}s missing)" for kind, n in missing.items() if n))
+    return manifest
+
+
+def annotate_stream(stream_file, reference, field):
+    # Adds `field` (atlas.json#<id>) to every entry of the stream, rewritten atomically
+    tmp = stream_file + ".atlas"
+    with JsonlWriter(tmp, mode="w") as writer:
+        for entry in iter_entries(stream_file):
+            entry[field] = f"{reference}#{entry['id']}"
+            writer.write(entry)
+    os.replace(tmp, stream_file)
+
+
+class StreamEntries:
+    # Re-iterable view of a stream (one pass per atlas kind), read one entry at a
+    # time from the line offsets in ID order; repeated IDs collapse to the last line
+    def __init__(self, stream_file):
+        index = index_jsonl(stream_file)
+        self.path, self.offsets = stream_file, [index[i][0] for i in sorted(index)]
+
+    def __iter__(self):
+        return read_entries_at(self.path, self.offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+
+# === BUILDER HOOK ===
+# Runs on the stream before it is finalized, so the atlas reference ends up in
+# the JSON output next to the entry's silhouette.
+async def export_atlas(args, stream_file, base_url=ATLAS_DIR + "/", field="atlas"):
+    entries = StreamEntries(stream_file)
+    if "sprite" in args.atlas_kinds:
+        await mirror_from_args(args, entries)
+    build_atlas(entries, args.atlas_dir, args.atlas_sizes, args.atlas_by_generation, args.atlas_kinds,
+                silhouette_dir=args.silhouette_dir)
+    annotate_stream(stream_file, base_url + ATLAS_MANIFEST, field)
+
+
+def add_atlas_arguments(parser):
+    parser.add_argument("--atlas", action="store_true",
+                        help="pack silhouettes and sprites into texture atlases with an atlas.json coordinate manifest")
+    parser.add_argument("--atlas-dir", default=ATLAS_DIR)
+    parser.add_argument("--atlas-sizes", type=parse_sizes, default=[0],
+                        help="comma-separated size variants: 0 = original, N = downscaled to N px (e.g. 0,128)")
+    parser.add_argument("--atlas-by-generation", action="store_true", help="one set of sheets per generation")
+    parser.add_argument("--atlas-kinds", type=lambda text: [k for k in text.split(",") if k in KINDS],
+                        default=list(KINDS), help="silhouette,sprite (default both)")
+    return parser
+
+
+async def mirror_from_args(args, entries):
+    async with engine_from_args(args) as engine:
+        await mirror_sprites(engine, entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack silhouettes and sprites into texture atlases")
+    parser.add_argument("source", help="pokedex_*.json or .jsonl")
+    parser.add_argument("--silhouette-dir", default=SILHOUETTE_DIR)
+    parser.add_argument("--offline", action="store_true", help="use the local sprite mirror only")
+    add_atlas_arguments(parser)
+    add_engine_arguments(parser)
+    cli = parser.parse_args()
+    entries = []
+    for entry in iter_entries(cli.source):
+        if "id" in entry:
+            entries.append({k: v for k, v in entry.items() if k != "forms"})
+        entries.extend(entry.get("forms", []))  # grouped {"pokemon": [...]} output
+    if "sprite" in cli.atlas_kinds and not cli.offline:
+        asyncio.run(mirror_from_args(cli, entries))
+    build_atlas(entries, cli.atlas_dir, cli.atlas_sizes, cli.atlas_by_generation, cli.atlas_kinds,
+                silhouette_dir=cli.silhouette_dir)
+
+
+if __name__ == "__main__":
+    main()
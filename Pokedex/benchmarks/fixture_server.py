@@ -0,0 +1,321 @@
+import argparse, asyncio, hashlib, io, json, os, random, sys, time
+from aiohttp import web
+from PIL import Image, ImageDraw
+
+POKEDEX_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, POKEDEX_DIR)
+
+from fetch_engine import FetchEngine
+
+UPSTREAM_API = "https://pokeapi.co/api/v2"
+UPSTREAM_MEDIA = "https://raw.githubusercontent.com/PokeAPI/sprites/master"
+FIRST_FORM_ID = 10001
+# Alternate forms served by the synthesized fixtures (IDs from FIRST_FORM_ID on)
+SYNTHETIC_FORMS = {3: ["mega"], 6: ["mega-x", "mega-y"], 26: ["alola"], 52: ["alola", "galar"],
+                   150: ["mega-x", "mega-y"], 479: ["heat", "wash"], 892: ["rapid-strike"]}
+FLAVOR_VERSIONS = ("red", "blue", "yellow")  # the same text repeated per version, as upstream does
+
+
+# === FIXTURE SOURCES ===
+# Recorded: a directory mirroring the upstream paths (api/v2/pokemon/1.json,
+# api/v2/pokemon-species/1.json, api/v2/evolution-chain/1.json and media/...png,
+# the list endpoints as a single page in api/v2/pokemon-species.json) with
+# upstream URLs rewritten to this server when served.
+# Synthesized: payloads rebuilt from the repo's own JSON outputs, artwork taken
+# from silhouettes/, so the harness works with no network at all.
+class RecordedFixtures:
+    def __init__(self, root):
+        self.root = root
+
+    def get(self, path, base, query=None):
+        path = path.strip("/")
+        file = os.path.join(self.root, path if "." in os.path.basename(path) else path + ".json")
+        if not os.path.exists(file):
+            return None, None
+        with open(file, "rb") as f:
+            body = f.read()
+        if file.endswith(".json"):
+            text = body.decode("utf-8").replace(UPSTREAM_API, f"{base}/api/v2").replace(UPSTREAM_MEDIA, f"{base}/media")
+            return text.encode("utf-8"), "application/json"
+        return body, "image/png"
+
+
+class SyntheticFixtures:
+    def __init__(self, pokedex_dir=POKEDEX_DIR):
+        with open(os.path.join(pokedex_dir, "pokedex_flowise_ready.json"), "r", encoding="utf-8") as f:
+            flowise = json.load(f)
+        with open(os.path.join(pokedex_dir, "pokedex_metadata_ready.json"), "r", encoding="utf-8") as f:
+            self.meta = {e["id"]: e for e in json.load(f)}
+        self.entries = {e["id"]: e for e in flowise if isinstance(e, dict) and "id" in e}
+        for i, e in self.meta.items():
+            self.entries.setdefault(i, e)
+        self.silhouette_dir = os.path.join(pokedex_dir, "silhouettes")
+        self.chains = {}
+        for i in sorted(self.entries):
+            self.chains.setdefault(self._family(i), len(self.chains) + 1)
+        self.chain_by_id = {cid: family for family, cid in self.chains.items()}
+        self.forms = {}  # form id -> (species id, form slug)
+        for sid, suffixes in SYNTHETIC_FORMS.items():
+            for suffix in suffixes:
+                if sid in self.entries:
+                    self.forms[FIRST_FORM_ID + len(self.forms)] = (sid, f"{self.slug(self.entries[sid]['name'])}-{suffix}")
+        self._placeholder = None
+
+    @staticmethod
+    def slug(name):
+        return name.lower().replace(" ", "-")
+
+    def _family(self, i):
+        return tuple(self.meta.get(i, self.entries[i]).get("evolutions") or [self.entries[i]["name"]])
+
+    def _artwork(self, i):
+        if i in self.forms:
+            i = self.forms[i][0]
+        path = os.path.join(self.silhouette_dir, f"{self.slug(self.entries[i]['name'])}.png")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read()
+        if self._placeholder is None:
+            img = Image.new("RGBA", (475, 475), (0, 0, 0, 0))
+            ImageDraw.Draw(img).ellipse((50, 50, 400, 420), fill=(200, 80, 30, 255))
+            buf = io.BytesIO()
+            img.save(buf, "PNG")
+            self._placeholder = buf.getvalue()
+        return self._placeholder
+
+    def _list(self, kind, base, query):
+        if kind == "pokemon-species":
+            items = [(i, self.slug(self.entries[i]["name"])) for i in sorted(self.entries)]
+        else:
+            items = ([(i, self.slug(self.entries[i]["name"])) for i in sorted(self.entries)]
+                     + [(i, name) for i, (_, name) in self.forms.items()])
+        limit, offset = int(query.get("limit", 20)), int(query.get("offset", 0))
+        nxt = f"{base}/api/v2/{kind}?offset={offset + limit}&limit={limit}" if offset + limit < len(items) else None
+        results = [{"name": name, "url": f"{base}/api/v2/{kind}/{i}/"} for i, name in items[offset:offset + limit]]
+        return json.dumps({"count": len(items), "next": nxt, "previous": None, "results": results}).encode()
+
+    def get(self, path, base, query=None):
+        parts = path.strip("/").split("/")
+        if parts[-1] in ("pokemon", "pokemon-species"):
+            return self._list(parts[-1], base, query or {}), "application/json"
+        try:
+            kind, key = parts[-2], int(os.path.splitext(parts[-1])[0])
+        except (IndexError, ValueError):
+            return None, None
+        if kind in ("art", "sprites"):
+            return (self._artwork(key), "image/png") if key in self.entries or key in self.forms else (None, None)
+        if kind == "evolution-chain":
+            family = self.chain_by_id.get(key)
+            if not family:
+                return None, None
+            node = None
+            for name in reversed(family):
+                node = {"species": {"name": self.slug(name)}, "evolves_to": [node] if node else []}
+            return json.dumps({"id": key, "chain": node}).encode(), "application/json"
+        sid, form = self.forms.get(key, (key, None))
+        e = self.entries.get(sid)
+        if not e or (form and kind != "pokemon"):
+            return None, None
+        if kind == "pokemon":
+            payload = {"id": key, "name": form or self.slug(e["name"]),
+                       "species": {"name": self.slug(e["name"]), "url": f"{base}/api/v2/pokemon-species/{sid}/"},
+                       "types": [{"slot": n + 1, "type": {"name": t.lower()}} for n, t in enumerate(e["types"])],
+                       "sprites": {"front_default": f"{base}/sprites/{key}.png",
+                                   "other": {"official-artwork": {"front_default": f"{base}/art/{key}.png"}}}}
+        elif kind == "pokemon-species":
+            payload = {"id": key, "name": self.slug(e["name"]),
+                       "flavor_text_entries": [{"flavor_text": e.get("description", ""), "language": {"name": "en"},
+                                                "version": {"name": version}} for version in FLAVOR_VERSIONS],
+                       "genera": [{"genus": e.get("region_name") or "Pokémon", "language": {"name": "en"}}],
+                       "evolution_chain": {"url": f"{base}/api/v2/evolution-chain/{self.chains[self._family(key)]}/"},
+                       "varieties": [{"is_default": True, "pokemon": {"name": self.slug(e["name"]),
+                                                                      "url": f"{base}/api/v2/pokemon/{key}/"}}]
+                                    + [{"is_default": False, "pokemon": {"name": name, "url": f"{base}/api/v2/pokemon/{i}/"}}
+                                       for i, (s, name) in self.forms.items() if s == key]}
+        else:
+            return None, None
+        return json.dumps(payload).encode(), "application/json"
+
+
+# === SERVER ===
+# Every fixture response goes through one handler that adds the configured latency
+# (+ jitter), injects errors (503 by default, optionally 429 + Retry-After) at
+# `error_rate` (seeded, so runs are reproducible) or for a whole outage window,
+# answers If-None-Match with 304 and counts requests per kind.
+class FixtureServer:
+    def __init__(self, fixtures, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, seed=0,
+                 error_status=503, retry_after=None, outage=None):
+        self.fixtures = fixtures
+        self.host, self.port = host, port
+        self.latency, self.jitter, self.error_rate = latency, jitter, error_rate
+        self.error_status, self.retry_after = error_status, retry_after
+        self.outage = outage  # (start, duration) in seconds after start(): every request fails
+        self.random = random.Random(seed)
+        self.started_at = time.monotonic()
+        self.stats = {"requests": 0, "errors_injected": 0, "not_modified": 0, "not_found": 0}
+        self.runner = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def api_base(self):
+        return self.base_url + "/api/v2"
+
+    async def handle(self, request):
+        self.stats["requests"] += 1
+        delay = self.latency + (self.random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        elapsed = time.monotonic() - self.started_at
+        in_outage = self.outage and self.outage[0] <= elapsed < self.outage[0] + self.outage[1]
+        if in_outage or (self.error_rate and self.random.random() < self.error_rate):
+            self.stats["errors_injected"] += 1
+            headers = {"Retry-After": str(self.retry_after)} if self.retry_after is not None else None
+            return web.Response(status=self.error_status, headers=headers)
+        body, content_type = self.fixtures.get(request.path, self.base_url, request.query)
+        if body is None:
+            self.stats["not_found"] += 1
+            return web.Response(status=404)
+        tag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == tag:
+            self.stats["not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": tag})
+        return web.Response(body=body, content_type=content_type, headers={"ETag": tag})
+
+    async def handle_stats(self, request):
+        return web.json_response(self.stats)
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/__stats", self.handle_stats)
+        app.router.add_get("/{path:.*}", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.started_at = time.monotonic()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+
+def load_fixtures(path=None):
+    return RecordedFixtures(path) if path else SyntheticFixtures()
+
+
+# === RECORDER ===
+# Fetches the species / pokemon lists, then species, every variety's pokemon
+# payload, evolution-chain and artwork payloads from the live API once (paced
+# by the usual token bucket) and stores them as fixtures.
+async def record(ids, out_dir, rate=20.0, concurrency=10):
+    def save(path, body):
+        file = os.path.join(out_dir, path)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        with open(file, "wb") as f:
+            f.write(body)
+
+    def local(url):
+        return url.replace(UPSTREAM_API, "api/v2").replace(UPSTREAM_MEDIA, "media").split("?")[0].rstrip("/")
+
+    chains, recorded = set(), set()
+    async with FetchEngine(concurrency=concurrency, rate=rate) as engine:
+        for kind in ("pokemon-species", "pokemon"):
+            url = engine.api_url(f"{kind}?limit=100000&offset=0")
+            if body := await engine.fetch_bytes(url):
+                save(local(url) + ".json", body)
+
+        async def pokemon(url):
+            body = await engine.fetch_bytes(url)
+            if not body:
+                return
+            save(local(url) + ".json", body)
+            art = json.loads(body)["sprites"]["other"]["official-artwork"]["front_default"]
+            if art and (image := await engine.fetch_bytes(art)):
+                save(local(art), image)
+
+        async def one(i):
+            url = engine.api_url(f"pokemon-species/{i}")
+            body = await engine.fetch_bytes(url)
+            if not body:
+                return
+            save(local(url) + ".json", body)
+            data = json.loads(body)
+            varieties = [v["pokemon"]["url"] for v in data.get("varieties", [])] or [engine.api_url(f"pokemon/{i}")]
+            recorded.update(varieties)
+            chain_url = data.get("evolution_chain", {}).get("url")
+            if chain_url and chain_url not in chains:
+                chains.add(chain_url)
+                if chain := await engine.fetch_bytes(chain_url):
+                    save(local(chain_url) + ".json", chain)
+            await asyncio.gather(*(pokemon(url) for url in varieties))
+            print(f"📼 Recorded #{i}")
+
+        await asyncio.gather(*(one(i) for i in ids))
+    print(f"📼 Recorded {len(ids)} species, {len(recorded)} Pokémon and {len(chains)} evolution chains to {out_dir}/")
+
+
+def parse_outage(text):
+    if not text:
+        return None
+    start, _, duration = text.partition(":")
+    return float(start), float(duration)
+
+
+def parse_ids(text):
+    start, _, end = text.partition("-")
+    return list(range(int(start), int(end or start) + 1))
+
+
+async def serve(cli):
+    server = FixtureServer(load_fixtures(cli.fixtures), cli.host, cli.port, cli.latency, cli.jitter,
+                           cli.error_rate, cli.seed, cli.error_status, cli.retry_after, parse_outage(cli.outage))
+    async with server:
+        print(f"🧪 Fixture server on {server.api_base} (latency {cli.latency}±{cli.jitter} ms, "
+              f"error rate {cli.error_rate:.0%}) — stats at {server.base_url}/__stats")
+        while True:
+            await asyncio.sleep(3600)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local PokeAPI stand-in for offline builds and benchmarks")
+    sub = parser.add_subparsers(dest="command")
+    srv = sub.add_parser("serve", help="serve recorded or synthesized fixtures (default)")
+    rec = sub.add_parser("record", help="record fixtures from the live PokeAPI")
+    for p in (parser, srv):
+        p.add_argument("--fixtures", help="recorded fixture directory (default: synthesize from the repo JSON)")
+        p.add_argument("--host", default="127.0.0.1")
+        p.add_argument("--port", type=int, default=8765)
+        p.add_argument("--latency", type=float, default=0.0, help="added latency per response (ms)")
+        p.add_argument("--jitter", type=float, default=0.0, help="± uniform jitter on the latency (ms)")
+        p.add_argument("--error-rate", type=float, default=0.0, help="fraction of responses answered with 503")
+        p.add_argument("--seed", type=int, default=0)
+        p.add_argument("--error-status", type=int, default=503, help="status used for injected errors (e.g. 429)")
+        p.add_argument("--retry-after", type=int, default=None, help="Retry-After seconds sent with injected errors")
+        p.add_argument("--outage", default=None, help="START:DURATION seconds during which every request fails")
+    rec.add_argument("--ids", default="1-1025", help="ID range, e.g. 1-151")
+    rec.add_argument("--out", default="fixtures")
+    rec.add_argument("--rate", type=float, default=20.0)
+    cli = parser.parse_args()
+    if cli.command == "record":
+        asyncio.run(record(parse_ids(cli.ids), cli.out, cli.rate))
+    else:
+        try:
+            asyncio.run(serve(cli))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import argparse, asyncio, importlib.util, json, os, platform, shutil, statistics, subprocess, sys, tempfile, time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+POKEDEX_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, POKEDEX_DIR)
+
+from checkpoint_journal import CheckpointJournal
+from evolution_index import EvolutionIndex
+from fetch_engine import FetchEngine
+from fixture_server import FixtureServer, load_fixtures, parse_outage
+from pokedex_stream import JsonlWriter, finalize_json_array
+from silhouette_engine import SilhouetteOptions, silhouette_from_bytes
+from silhouette_pipeline import SilhouettePipeline
+
+SCRIPTS = {
+    "metadata": ("generate_full_pokedex.py", False),
+    "forms": ("generate_full_pokedex_wforms.py", True),
+    "flowise": ("pokedex-builder.py", True),
+}
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+
+# === HELPERS ===
+def summarize(samples, wall=None):
+    samples = sorted(samples)
+    result = {
+        "count": len(samples),
+        "p50_ms": round(1000 * statistics.median(samples), 3) if samples else None,
+        "p95_ms": round(1000 * samples[int(0.95 * (len(samples) - 1))], 3) if samples else None,
+        "mean_ms": round(1000 * statistics.fmean(samples), 3) if samples else None,
+    }
+    if wall is not None:
+        result["seconds"] = round(wall, 3)
+        result["per_second"] = round(len(samples) / wall, 2) if wall else None
+    return result
+
+
+def load_script(key, workdir):
+    # The builders are scripts (one has a dash in its name), so load them by path;
+    # they create their output folders relative to the cwd on import
+    filename, _ = SCRIPTS[key]
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        spec = importlib.util.spec_from_file_location(f"bench_{key}", os.path.join(POKEDEX_DIR, filename))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    return module
+
+
+class Workdir:
+    # Fresh temporary cwd per benchmark so silhouettes/outputs never hit a warm cache
+    def __enter__(self):
+        self.cwd = os.getcwd()
+        self.path = tempfile.mkdtemp(prefix="pokedex-bench-")
+        os.makedirs(os.path.join(self.path, "silhouettes"), exist_ok=True)
+        os.chdir(self.path)
+        return self.path
+
+    def __exit__(self, *exc):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+# === BENCHMARKS ===
+async def bench_get_pokemon_data(server, key, ids, concurrency):
+    with Workdir() as workdir:
+        module = load_script(key, workdir)
+        evo_index = EvolutionIndex()
+        timings = []
+        async with FetchEngine(concurrency=concurrency, rate=0, base_url=server.api_base) as engine, \
+                SilhouettePipeline(SilhouetteOptions(soft_edges=SCRIPTS[key][1])) as pipeline:
+            async def one(i):
+                started = time.perf_counter()
+                data = await module.get_pokemon_data(engine, i, evo_index, pipeline)
+                timings.append(time.perf_counter() - started)
+                return data
+
+            started = time.perf_counter()
+            results = await asyncio.gather(*(one(i) for i in ids))
+            wall = time.perf_counter() - started
+    result = summarize(timings, wall)
+    result["failed"] = sum(1 for r in results if not r)
+    result["chains_fetched"] = evo_index.fetched
+    return result
+
+
+async def bench_silhouettes(server, ids):
+    results = {}
+    async with FetchEngine(concurrency=10, rate=0, base_url=server.api_base) as engine:
+        artwork = await asyncio.gather(*(engine.fetch_bytes(f"{server.base_url}/art/{i}.png") for i in ids))
+    artwork = [a for a in artwork if a]
+    for fmt in ("rgba", "palette"):
+        with Workdir():
+            timings = []
+            started = time.perf_counter()
+            for n, image_bytes in enumerate(artwork):
+                t = time.perf_counter()
+                silhouette_from_bytes(image_bytes, f"silhouettes/{n}.png", SilhouetteOptions(fmt))
+                timings.append(time.perf_counter() - t)
+            results[f"render_{fmt}"] = summarize(timings, time.perf_counter() - started)
+
+    # create_silhouette end to end: artwork download + process pool + write
+    with Workdir() as workdir:
+        module = load_script("flowise", workdir)
+        timings = []
+        async with FetchEngine(concurrency=10, rate=0, base_url=server.api_base) as engine, \
+                SilhouettePipeline(SilhouetteOptions(soft_edges=True)) as pipeline:
+            async def one(i):
+                t = time.perf_counter()
+                await module.create_silhouette(engine, pipeline, f"{server.base_url}/art/{i}.png", f"poke-{i}")
+                timings.append(time.perf_counter() - t)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(one(i) for i in ids))
+            results["create_silhouette"] = summarize(timings, time.perf_counter() - started)
+    return results
+
+
+def bench_checkpoint(entries=1025):
+    sample = {"id": 0, "name": "Bulbasaur", "generation": "Gen 1 (Kanto)", "types": ["Grass", "Poison"],
+              "description": "A strange seed was planted on its back at birth." * 2,
+              "strengths": ["Fairy", "Grass", "Ground", "Rock", "Water"],
+              "weaknesses": ["Fire", "Flying", "Ice", "Psychic"], "evolves_from": None, "evolves_to": ["Ivysaur"],
+              "sprite_url": "https://example.invalid/1.png", "artwork_url": "https://example.invalid/a/1.png",
+              "silhouette_url": "/silhouettes/bulbasaur.png"}
+    results = {}
+    with Workdir():
+        journal = CheckpointJournal("bench_checkpoint.jsonl")
+        timings = []
+        started = time.perf_counter()
+        with JsonlWriter("bench.jsonl") as writer:
+            for i in range(1, entries + 1):
+                t = time.perf_counter()
+                writer.write(dict(sample, id=i))
+                journal.record_done(i)
+                timings.append(time.perf_counter() - t)
+        journal.close()
+        results["journal_and_stream_write"] = summarize(timings, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        done, _ = CheckpointJournal("bench_checkpoint.jsonl").replay()
+        results["journal_replay"] = {"entries": len(done), "seconds": round(time.perf_counter() - started, 4)}
+
+        started = time.perf_counter()
+        finalize_json_array("bench.jsonl", "bench.json")
+        results["finalize_json"] = {"entries": entries, "seconds": round(time.perf_counter() - started, 4)}
+
+        # The pre-journal approach: re-dump the whole list on every checkpoint (every 10 IDs)
+        data, started = [], time.perf_counter()
+        for i in range(1, entries + 1):
+            data.append(dict(sample, id=i))
+            if i % 10 == 0:
+                with open("legacy_checkpoint.json", "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+        results["legacy_full_redump"] = {"entries": entries, "seconds": round(time.perf_counter() - started, 4)}
+    return results
+
+
+async def bench_full_build(server, key, concurrency):
+    filename, _ = SCRIPTS[key]
+    with Workdir() as workdir:
+        started = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.join(POKEDEX_DIR, filename), "--api-base", server.api_base, "--rate", "0",
+            "--concurrency", str(concurrency), "--no-cache", "--evolution-index", "",
+            cwd=workdir, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+        output, _ = await process.communicate()
+        wall = time.perf_counter() - started
+        lines = output.decode("utf-8", "replace").splitlines()
+    return {
+        "seconds": round(wall, 3),
+        "returncode": process.returncode,
+        "added": sum(1 for line in lines if line.startswith("✅ Added")),
+        "skipped": sum(1 for line in lines if line.startswith("❌ Skipped")),
+        "summary": [line for line in lines if line.startswith(("🔭", "🎉", "📊", "🧬"))],
+    }
+
+
+# === RESULTS ===
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=POKEDEX_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results, prefix=""):
+    for key, value in results.items():
+        if isinstance(value, dict):
+            yield from flatten(value, f"{prefix}{key}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield f"{prefix}{key}", value
+
+
+def compare(current, baseline_file):
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = dict(flatten(json.load(f)["results"]))
+    print(f"\n📈 Compared with {baseline_file}:")
+    for key, value in flatten(current):
+        if key.endswith(("seconds", "_ms")) and baseline.get(key):
+            change = (value - baseline[key]) / baseline[key]
+            flag = "🔺" if change > 0.10 else "🔻" if change < -0.10 else "  "
+            print(f"{flag} {key:<55} {baseline[key]:>10} -> {value:<10} ({change:+.0%})")
+
+
+async def run(cli):
+    ids = list(range(1, cli.ids + 1))
+    results = {}
+    server = FixtureServer(load_fixtures(cli.fixtures), latency=cli.latency, jitter=cli.jitter,
+                           error_rate=cli.error_rate, seed=cli.seed, error_status=cli.error_status,
+                           retry_after=cli.retry_after, outage=parse_outage(cli.outage))
+    async with server:
+        print(f"🧪 Fixture server on {server.api_base}")
+        for key in cli.scripts:
+            print(f"⏱️ get_pokemon_data [{key}] x{len(ids)}")
+            results[f"get_pokemon_data.{key}"] = await bench_get_pokemon_data(server, key, ids, cli.concurrency)
+        print(f"⏱️ silhouettes x{len(ids)}")
+        results["silhouette"] = await bench_silhouettes(server, ids)
+        print("⏱️ checkpointing")
+        results["checkpoint"] = bench_checkpoint()
+        if not cli.skip_full:
+            for key in cli.scripts:
+                print(f"⏱️ full build [{key}]")
+                results[f"full_build.{key}"] = await bench_full_build(server, key, cli.concurrency)
+        results["fixture_server"] = dict(server.stats)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Pokédex builders against a local fixture server")
+    parser.add_argument("--fixtures", help="recorded fixture directory (default: synthesized from the repo JSON)")
+    parser.add_argument("--ids", type=int, default=100, help="IDs used by the per-function benchmarks")
+    parser.add_argument("--scripts", nargs="+", choices=list(SCRIPTS), default=list(SCRIPTS))
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=20.0, help="fixture latency per response (ms)")
+    parser.add_argument("--jitter", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=int, default=None)
+    parser.add_argument("--outage", default=None, help="START:DURATION seconds of total upstream failure")
+    parser.add_argument("--skip-full", action="store_true", help="skip the full main() builds")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results file to diff against")
+    cli = parser.parse_args()
+
+    results = asyncio.run(run(cli))
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "settings": {k: v for k, v in vars(cli).items() if k not in ("output", "compare")},
+        },
+        "results": results,
+    }
+    output = cli.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"💾 Results saved to {output}")
+    if cli.compare:
+        compare(results, cli.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import asyncio, os
+
+from atlas_packer import add_atlas_arguments
+from checkpoint_journal import CheckpointJournal
+from discovery import add_discovery_arguments, work_set_from_args
+from evolution_index import EvolutionIndex, add_evolution_arguments
+from fetch_engine import add_engine_arguments, engine_from_args
+from flavor_text import add_flavor_arguments
+from incremental import load_source_hashes, plan_incremental, save_source_hashes, source_hash, source_urls
+from metrics import add_metrics_arguments, count, span
+from pokedex_stream import JsonlWriter, index_jsonl, jsonl_path, repair_jsonl
+from sharding import add_shard_arguments, shard_path
+from silhouette_pipeline import add_pipeline_arguments, pipeline_from_args
+
+
+# === BUILD LOOP shared by the three builders ===
+# Discovers the work set from the list endpoints (with `forms`, alternate forms
+# too), resumes from the builder's journal, fetches every ID that is not done
+# yet (previously failed IDs are retried) and streams each finished entry to
+# <output>.jsonl while journaling its ID. With --incremental the existing
+# output is scanned first and only new/changed entries are rebuilt; unchanged
+# ones are copied into the new stream. With --shard k/N only that slice is
+# built, into its own journal and <output>.shard-k-of-N.jsonl. Returns the
+# number of entries in the stream and the journal (removed by the caller once
+# the output is final).
+async def run_build(args, get_pokemon_data, journal_file, output_file, iter_existing, silhouette_file,
+                    forms=False, soft_edges=False):
+    final_file, final_journal = output_file, journal_file
+    if args.shard:
+        journal_file, output_file = shard_path(journal_file, args.shard), shard_path(output_file, args.shard)
+        print(f"🧩 Shard {args.shard[0]}/{args.shard[1]}: journal {journal_file}, output {jsonl_path(output_file)}")
+    stream_file = jsonl_path(output_file)
+    journal = CheckpointJournal(journal_file)
+    done, failed = journal.replay()
+    if done:
+        # After a power loss the journal can hold "done" records whose entries
+        # never reached the stream: those IDs are built again
+        repair_jsonl(stream_file)
+        lost = done - set(index_jsonl(stream_file) if os.path.exists(stream_file) else ())
+        if lost:
+            print(f"🩹 {len(lost)} journaled IDs missing from {stream_file}, rebuilding them: {sorted(lost)[:10]}")
+            done -= lost
+    resumed = set(done)
+    previous = None
+    if done or failed:
+        print(f"🔁 Resuming: {len(done)} entries already saved, {len(failed)} failed IDs to retry")
+    else:
+        print("🚀 Starting new Pokédex build...")
+        if os.path.exists(stream_file):
+            # keep the last stream as an incremental source, start a fresh one
+            previous = stream_file + ".prev"
+            os.replace(stream_file, previous)
+
+    # A shard can reuse the merged output of an earlier run for --incremental
+    hashes = load_source_hashes(journal_file) or load_source_hashes(final_journal)
+    source = next((path for path in (output_file, previous, final_file) if path and os.path.exists(path)), None)
+    existing = {}
+    if args.incremental and source:
+        existing = {entry["id"]: silhouette_file(entry) for entry in iter_existing(source)}
+
+    evo_index = EvolutionIndex.load(args.evolution_index)
+    # Only a window of IDs is in flight at once so they finish (and get journaled)
+    # progressively instead of every ID waiting on the rate limiter together
+    window = max(1, args.concurrency) * 2
+    id_slots = asyncio.Semaphore(window)
+    with JsonlWriter(stream_file) as writer:
+        journal.before_sync = writer.sync
+        async with engine_from_args(args) as engine, pipeline_from_args(args, soft_edges) as pipeline:
+            if existing and engine.cache:
+                engine.cache.ttl = 0  # revalidate everything with conditional GETs
+            work = await work_set_from_args(args, engine, forms, done, window)
+            species = work.species
+            todo = [i for i in work if i not in done]
+            print(f"📋 {len(todo)} of {len(work)} IDs to build")
+            if existing:
+                with span("incremental_plan"):
+                    keep, todo = await plan_incremental(engine, todo, existing, hashes, window, species,
+                                                           pipeline.store.has)
+                work.trim_pins(engine, todo)
+                for entry in iter_existing(source):
+                    if entry["id"] in keep:
+                        writer.write(entry)
+                        journal.record_done(entry["id"])
+                        done.add(entry["id"])
+
+            async def fetch(i):
+                async with id_slots:
+                    try:
+                        with span("entry"):
+                            return i, await get_pokemon_data(engine, i, evo_index, pipeline, species_id=species(i))
+                    except Exception as e:
+                        count("entry_errors", error=type(e).__name__)
+                        print(f"⚠️ Error on #{i}: {e}")
+                        return i, None
+
+            async def build_ids(ids):
+                failed_ids = []
+                for future in asyncio.as_completed([fetch(i) for i in ids]):
+                    i, data = await future
+                    if data:
+                        writer.write(data)
+                        journal.record_done(i)
+                        done.add(i)
+                        count("entries_built")
+                        hashes[i] = await source_hash(engine, i, species(i))
+                        print(f"✅ Added #{i}: {data['name']}")
+                    else:
+                        permanent = any(url in engine.permanent_failures
+                                        for url in source_urls(engine, i, species(i)))
+                        journal.record_failed(i, "permanent" if permanent else "transient")
+                        failed_ids.append(i)
+                        count("entries_failed")
+                        print(f"❌ Skipped #{i} (failed to fetch)")
+                return failed_ids
+
+            failed_ids = await build_ids(todo)
+            # Dead-letter passes: transient failures (timeouts, 5xx, open circuit) get
+            # another go once the circuit allows it; permanent ones (404) do not
+            for attempt in range(args.dead_letter_passes):
+                retry = [i for i in failed_ids
+                         if not any(url in engine.permanent_failures for url in source_urls(engine, i, species(i)))]
+                if not retry:
+                    break
+                if engine.breaker:
+                    await engine.breaker.wait_until_ready()
+                print(f"🪦 Dead-letter pass {attempt + 1}: retrying {len(retry)} failed IDs")
+                failed_ids = [i for i in failed_ids if i not in retry] + await build_ids(retry)
+            if failed_ids:
+                print(f"🪦 Dead letter: {len(failed_ids)} IDs still failing {sorted(failed_ids)} "
+                      f"(retried on the next run)")
+
+            # Entries resumed from the journal were built before the hashes were saved
+            async def rehash(i):
+                async with id_slots:
+                    hashes[i] = await source_hash(engine, i, species(i))
+
+            await asyncio.gather(*(rehash(i) for i in resumed))
+
+    journal.close()
+    if previous:
+        os.remove(previous)
+    save_source_hashes(journal_file, {i: hashes[i] for i in done if hashes.get(i)})
+    if args.evolution_index:
+        evo_index.save(args.evolution_index)
+    print(f"🧬 Evolution chains: {evo_index.fetched} loaded through the engine, {len(evo_index.chain_members)} indexed")
+    print(f"📝 Streamed {len(done)} entries to {stream_file}")
+    return len(done), journal
+
+
+def add_build_arguments(parser):
+    add_engine_arguments(parser)
+    add_discovery_arguments(parser)
+    add_evolution_arguments(parser)
+    add_pipeline_arguments(parser)
+    add_metrics_arguments(parser)
+    add_shard_arguments(parser)
+    parser.add_argument("--jsonl-only", action="store_true",
+                        help="stop after the streamed .jsonl output, skip the finalized JSON file")
+    parser.add_argument("--incremental", action="store_true",
+                        help="keep unchanged entries from the existing output and rebuild only new/changed ones")
+    parser.add_argument("--columnar", action="store_true",
+                        help="also export a memory-mappable .pdxc file with id/name indexes next to the output")
+    parser.add_argument("--search-index", action="store_true",
+                        help="also write a BM25 + fuzzy name search index (.search.json) next to the output")
+    parser.add_argument("--embeddings", action="store_true",
+                        help="also write retrieval chunks, hashed embeddings (.npy) and an IVF index; "
+                             "only chunks whose content hash changed are re-embedded")
+    add_flavor_arguments(parser)
+    add_atlas_arguments(parser)
+    return parser
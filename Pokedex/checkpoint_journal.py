@@ -0,0 +1,100 @@
+import json, os, time
+
+from metrics import span
+
+
+# === CHECKPOINT JOURNAL ===
+# Append-only JSON Lines: one small record per finished or failed ID (the
+# entries themselves are streamed to the output .jsonl), so a checkpoint costs
+# one write instead of re-dumping the whole Pokédex. Writes are flushed to the
+# OS immediately and fsync'd in batches (every `fsync_every` records or
+# `fsync_interval` seconds). On replay the last record for an ID wins and a
+# torn final line from a crash is dropped. `failed` tracks the IDs whose last
+# record is a failure; finish() only removes the journal once there are none.
+# `before_sync` (the output stream's sync) runs ahead of every fsync, so a
+# "done" record never becomes durable before the entry it stands for.
+class CheckpointJournal:
+    def __init__(self, path, fsync_every=25, fsync_interval=2.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.failed = set()
+        self.before_sync = None
+
+    def replay(self):
+        done, failed = set(), set()
+        if not os.path.exists(self.path):
+            return done, failed
+        valid_bytes = 0
+        with open(self.path, "rb") as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # torn write from a crash
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    break
+                valid_bytes += len(raw)
+                item_id = record["id"]
+                if record["status"] == "done":
+                    done.add(item_id)
+                    failed.discard(item_id)
+                else:
+                    failed.add(item_id)
+                    done.discard(item_id)
+        if valid_bytes < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_bytes)
+        self.failed = set(failed)
+        return done, failed
+
+    def _append(self, record):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        with span("checkpoint_write"):
+            self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def record_done(self, item_id):
+        self.failed.discard(item_id)
+        self._append({"id": item_id, "status": "done"})
+
+    def record_failed(self, item_id, reason=None):
+        self.failed.add(item_id)
+        self._append({"id": item_id, "status": "failed", "reason": reason})
+
+    def sync(self):
+        if self._file and self._unsynced:
+            if self.before_sync:
+                self.before_sync()
+            with span("checkpoint_fsync"):
+                os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._file:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def finish(self):
+        # End of a build: keep the journal while IDs still fail so the next run resumes and retries them
+        if self.failed:
+            self.close()
+            print(f"🪦 {len(self.failed)} IDs still failing {sorted(self.failed)}: "
+                  f"keeping {self.path}, the next run retries them")
+            return False
+        self.remove()
+        return True
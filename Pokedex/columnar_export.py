@@ -0,0 +1,288 @@
+import argparse, json, mmap, os, re, struct, sys, time
+from array import array
+
+from pokedex_stream import iter_entries
+
+MAGIC = b"PDXCOL01"
+NULL_REF = 0xFFFFFFFF
+NULL_INT = -(2 ** 31)
+EMPTY = 0  # hash slots store row + 1
+
+
+def columnar_path(output_file):
+    return os.path.splitext(output_file)[0] + ".pdxc"
+
+
+def normalize_name(name):
+    # "Mr. Mime", "mr-mime" and "MR MIME" all map to "mrmime"
+    return re.sub(r"[^0-9a-z]", "", name.lower()) if name else ""
+
+
+def _fnv1a(text):
+    h = 0x811C9DC5
+    for byte in text.encode("utf-8"):
+        h = ((h ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return h
+
+
+def _hash_id(value):
+    return (value * 2654435761) & 0xFFFFFFFF
+
+
+def _table_size(n):
+    size = 8
+    while size < n * 2:
+        size *= 2
+    return size
+
+
+def flatten_groups(items):
+    # Grouped output ({"pokemon": [base + forms]}) becomes one row per ID
+    for item in items:
+        if "forms" in item:
+            if "id" in item:
+                yield {k: v for k, v in item.items() if k != "forms"}
+            yield from item["forms"]
+        else:
+            yield item
+
+
+# === WRITER ===
+# Layout: MAGIC | u32 header length | JSON header | 8-byte aligned sections.
+# Every string (names, types, generations, URLs...) is interned once in a
+# shared string table; columns hold u32 references into it. List columns are
+# CSR-style (offsets + values). Two open-addressing hash tables map `id` and
+# normalized `name` to a row.
+class _Sections:
+    def __init__(self):
+        self.parts, self.meta, self.size = [], {}, 0
+
+    def add(self, key, arr):
+        data = arr.tobytes()
+        self.meta[key] = {"offset": self.size, "count": len(arr), "typecode": arr.typecode}
+        self.parts.append(data)
+        self.size += len(data)
+        pad = -self.size % 8
+        if pad:
+            self.parts.append(b"\0" * pad)
+            self.size += pad
+
+
+def _kind(values):
+    kinds = {type(v) for v in values if v is not None}
+    if kinds <= {int}:
+        return "int"
+    if kinds <= {str}:
+        return "str"
+    if kinds <= {list} and all(isinstance(x, str) for v in values if v for x in v):
+        return "strlist"
+    return "json"
+
+
+def export_columnar(entries, path):
+    # A later entry for the same ID wins (resumed .jsonl streams can repeat IDs)
+    rows = sorted({e["id"]: e for e in flatten_groups(entries)}.values(), key=lambda e: e["id"])
+    names = []
+    for entry in rows:
+        names.extend(k for k in entry if k not in names)
+
+    strings, string_ids = [], {}
+
+    def intern(text):
+        ref = string_ids.get(text)
+        if ref is None:
+            ref = string_ids[text] = len(strings)
+            strings.append(text)
+        return ref
+
+    sections = _Sections()
+    columns = {}
+    for name in names:
+        values = [entry.get(name) for entry in rows]
+        kind = _kind(values)
+        columns[name] = kind
+        if kind == "int":
+            sections.add(name, array("i", (NULL_INT if v is None else v for v in values)))
+        elif kind == "str":
+            sections.add(name, array("I", (NULL_REF if v is None else intern(v) for v in values)))
+        elif kind == "strlist":
+            offsets, refs = array("I", [0]), array("I")
+            for v in values:
+                refs.extend(intern(x) for x in (v or []))
+                offsets.append(len(refs))
+            sections.add(name + ".offsets", offsets)
+            sections.add(name + ".values", refs)
+        else:
+            sections.add(name, array("I", (NULL_REF if v is None else
+                                           intern(json.dumps(v, ensure_ascii=False)) for v in values)))
+
+    # Hash indexes (linear probing)
+    size = _table_size(len(rows))
+    by_id, by_name = array("I", [EMPTY]) * size, array("I", [EMPTY]) * size
+    norm_refs = array("I")
+    for row, entry in enumerate(rows):
+        slot = _hash_id(entry["id"]) & (size - 1)
+        while by_id[slot] != EMPTY:
+            slot = (slot + 1) & (size - 1)
+        by_id[slot] = row + 1
+        norm = normalize_name(entry.get("name"))
+        norm_refs.append(intern(norm))
+        slot = _fnv1a(norm) & (size - 1)
+        while by_name[slot] != EMPTY:
+            if normalize_name(rows[by_name[slot] - 1].get("name")) == norm:
+                break  # first row (lowest ID) wins for duplicate names
+            slot = (slot + 1) & (size - 1)
+        else:
+            by_name[slot] = row + 1
+    sections.add("@index.id", by_id)
+    sections.add("@index.name", by_name)
+    sections.add("@index.name_keys", norm_refs)
+
+    # String table last: u32 byte offsets + one UTF-8 blob
+    blob, offsets = bytearray(), array("I", [0])
+    for text in strings:
+        blob += text.encode("utf-8")
+        offsets.append(len(blob))
+    sections.add("@strings.offsets", offsets)
+    sections.add("@strings.blob", array("B", blob))
+
+    header = json.dumps({"rows": len(rows), "columns": columns, "sections": sections.meta,
+                         "byteorder": sys.byteorder}).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for part in sections.parts:
+            f.write(part)
+    os.replace(tmp, path)
+    return len(rows)
+
+
+def export_columnar_output(output_file, source=None):
+    # Builder hook: columnar copy next to the JSON output
+    target = columnar_path(output_file)
+    count = export_columnar(iter_entries(source or output_file), target)
+    print(f"📦 Columnar export: {count} rows -> {target}")
+    return target
+
+
+# === READER ===
+# Memory-maps the file and views each section in place; only the rows/strings
+# actually touched are decoded.
+class ColumnarPokedex:
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a columnar Pokédex file")
+        (header_len,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self._mm[start:start + header_len])
+        self._base = start + header_len
+        self._swap = header["byteorder"] != sys.byteorder
+        self._meta = header["sections"]
+        self.columns = header["columns"]
+        self.rows = header["rows"]
+        self._views = {}
+        self._str_offsets = self._section("@strings.offsets")
+        self._blob = self._section("@strings.blob")
+        self._by_id = self._section("@index.id")
+        self._by_name = self._section("@index.name")
+        self._name_keys = self._section("@index.name_keys")
+
+    def _section(self, key):
+        view = self._views.get(key)
+        if view is None:
+            meta = self._meta[key]
+            start = self._base + meta["offset"]
+            size = array(meta["typecode"]).itemsize
+            view = memoryview(self._mm)[start:start + meta["count"] * size].cast(meta["typecode"])
+            if self._swap and size > 1:
+                swapped = array(meta["typecode"], view)
+                swapped.byteswap()
+                view = memoryview(swapped)
+            self._views[key] = view
+        return view
+
+    def string(self, ref):
+        if ref == NULL_REF:
+            return None
+        return bytes(self._blob[self._str_offsets[ref]:self._str_offsets[ref + 1]]).decode("utf-8")
+
+    def value(self, row, name):
+        kind = self.columns[name]
+        if kind == "int":
+            v = self._section(name)[row]
+            return None if v == NULL_INT else v
+        if kind == "str":
+            return self.string(self._section(name)[row])
+        if kind == "strlist":
+            offsets, refs = self._section(name + ".offsets"), self._section(name + ".values")
+            return [self.string(refs[k]) for k in range(offsets[row], offsets[row + 1])]
+        raw = self.string(self._section(name)[row])
+        return None if raw is None else json.loads(raw)
+
+    def row(self, row):
+        return {name: self.value(row, name) for name in self.columns}
+
+    def column(self, name):
+        return [self.value(row, name) for row in range(self.rows)]
+
+    def row_for_id(self, poke_id):
+        ids, mask = self._section("id"), len(self._by_id) - 1
+        slot = _hash_id(poke_id) & mask
+        while self._by_id[slot] != EMPTY:
+            row = self._by_id[slot] - 1
+            if ids[row] == poke_id:
+                return row
+            slot = (slot + 1) & mask
+        return None
+
+    def row_for_name(self, name):
+        norm, mask = normalize_name(name), len(self._by_name) - 1
+        slot = _fnv1a(norm) & mask
+        while self._by_name[slot] != EMPTY:
+            row = self._by_name[slot] - 1
+            if self.string(self._name_keys[row]) == norm:
+                return row
+            slot = (slot + 1) & mask
+        return None
+
+    def get(self, poke_id):
+        row = self.row_for_id(poke_id)
+        return None if row is None else self.row(row)
+
+    def find(self, name):
+        row = self.row_for_name(name)
+        return None if row is None else self.row(row)
+
+    def __len__(self):
+        return self.rows
+
+    def close(self):
+        self._views.clear()
+        self._str_offsets = self._blob = self._by_id = self._by_name = self._name_keys = None
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a Pokédex JSON/JSONL file to the columnar format")
+    parser.add_argument("source", help="pokedex_*.json or .jsonl")
+    parser.add_argument("-o", "--output", help="defaults to <source>.pdxc")
+    cli = parser.parse_args()
+    target = cli.output or columnar_path(cli.source)
+    count = export_columnar(iter_entries(cli.source), target)
+    print(f"📦 Wrote {count} rows to {target} ({os.path.getsize(target) / 1e3:.0f} kB, "
+          f"source {os.path.getsize(cli.source) / 1e3:.0f} kB)")
+    started = time.perf_counter()
+    with ColumnarPokedex(target) as dex:
+        loaded = time.perf_counter()
+        sample = dex.find("pikachu") or dex.get(1)
+    print(f"⏱️ Cold load {1000 * (loaded - started):.2f} ms, sample lookup: {sample and sample['name']}")
@@ -0,0 +1,138 @@
+import asyncio, json
+from collections import Counter
+
+from metrics import count, span
+from sharding import in_shard
+
+LIST_PAGE_SIZE = 2000  # one page covers every species / Pokémon today
+LEGACY_IDS = range(1, 1026)
+
+
+def resource_id(url):
+    # ".../pokemon-species/25/" -> 25
+    return int(url.rstrip("/").rsplit("/", 1)[-1])
+
+
+def parse_id_ranges(text):
+    # "1-151,250,386-390" -> {1, ..., 151, 250, 386, ..., 390}
+    ids = set()
+    for part in text.split(","):
+        if part.strip():
+            start, _, end = part.strip().partition("-")
+            ids.update(range(int(start), int(end or start) + 1))
+    return ids
+
+
+def variety_ids(species_data):
+    # Default variety first, then the alternate forms (megas, regional forms...)
+    varieties = sorted(species_data.get("varieties", []), key=lambda v: not v.get("is_default"))
+    return [resource_id(v["pokemon"]["url"]) for v in varieties]
+
+
+# === WORK SET ===
+# pokemon id -> species id. Species builders get one entry per species (the
+# default variety shares the species ID); the forms builder also gets every
+# alternate form (IDs above 10000) linked to its species. Iterating a work
+# set yields IDs grouped by species so forms sharing a species payload are
+# built close together.
+class WorkSet:
+    def __init__(self, species_of):
+        self.species_of = species_of
+
+    @classmethod
+    def legacy(cls, only=None, shard=None):
+        return cls({i: i for i in LEGACY_IDS if (not only or i in only) and in_shard(i, shard)})
+
+    def species(self, poke_id):
+        return self.species_of.get(poke_id, poke_id)
+
+    def trim_pins(self, engine, ids):
+        # Once --incremental has decided what to rebuild: species payloads pinned by
+        # discovery stay in memory only for the IDs still to build
+        uses = Counter(self.species(i) for i in ids)
+        for sid in set(self.species_of.values()):
+            engine.repin(engine.api_url(f"pokemon-species/{sid}"), uses[sid])
+
+    def __iter__(self):
+        return iter(sorted(self.species_of, key=lambda i: (self.species_of[i], i)))
+
+    def __len__(self):
+        return len(self.species_of)
+
+
+# === LIST ENDPOINTS ===
+async def list_resource(engine, resource, page_size=LIST_PAGE_SIZE):
+    # {id: name} over every page of /<resource>?limit=&offset=, None if a page failed
+    found = {}
+    url = engine.api_url(f"{resource}?limit={page_size}&offset=0")
+    while url:
+        page = await engine.safe_request(url)
+        if page is None:
+            return None
+        for item in page.get("results", []):
+            found[resource_id(item["url"])] = item["name"]
+        url = page.get("next")
+    return found
+
+
+# === DISCOVERY STAGE ===
+# Pages /pokemon-species once instead of probing IDs one by one. With forms,
+# every species payload is fetched once to read its `varieties`; its digest is
+# recorded for --incremental and the raw payload is pinned in the engine for as
+# many requests as the species has forms left to build, so the build never
+# fetches it again. With report_orphans, /pokemon is paged too to list the
+# Pokémon no species claims.
+async def discover(engine, forms=False, only=None, done=(), window=20, shard=None, report_orphans=False):
+    with span("discovery"):
+        species = await list_resource(engine, "pokemon-species")
+        if species is None:
+            print(f"⚠️ Species list unavailable, falling back to IDs {LEGACY_IDS.start}-{LEGACY_IDS.stop - 1}")
+            return WorkSet.legacy(only, shard)
+        species = {i: name for i, name in species.items() if (not only or i in only) and in_shard(i, shard)}
+        if not forms:
+            print(f"🔭 Discovered {len(species)} species")
+            return WorkSet({i: i for i in species})
+
+        species_of = {}
+        slots = asyncio.Semaphore(window)
+
+        async def expand(sid):
+            url = engine.api_url(f"pokemon-species/{sid}")
+            async with slots:
+                body = await engine.fetch_bytes(url)
+            if not body:
+                species_of[sid] = sid  # the build retries it like any other failed ID
+                return
+            data = json.loads(body)
+            engine.record_payload(url, body, data)
+            ids = variety_ids(data) or [sid]
+            for i in ids:
+                species_of[i] = sid
+            engine.pin(url, body, sum(1 for i in ids if i not in done))
+
+        await asyncio.gather(*(expand(sid) for sid in species))
+        count("discovered_species", len(species))
+        count("discovered_pokemon", len(species_of))
+        if report_orphans and not only and not shard:
+            pokemon = await list_resource(engine, "pokemon") or {}
+            orphans = [i for i in pokemon if i not in species_of]
+            print(f"⚠️ {len(orphans)} Pokémon not listed in any species' varieties: {sorted(orphans)[:10]}")
+        forms_count = sum(1 for i, sid in species_of.items() if i != sid)
+        print(f"🔭 Discovered {len(species)} species, {len(species_of)} Pokémon ({forms_count} alternate forms)")
+        return WorkSet(species_of)
+
+
+def add_discovery_arguments(parser):
+    parser.add_argument("--ids", type=parse_id_ranges, default=None,
+                        help="only build these species, e.g. 1-151,250 (forms of those species included)")
+    parser.add_argument("--no-discovery", action="store_true",
+                        help=f"skip the list endpoints and probe IDs {LEGACY_IDS.start}-{LEGACY_IDS.stop - 1}")
+    parser.add_argument("--report-orphans", action="store_true",
+                        help="also page /pokemon and list the Pokémon no species lists among its varieties")
+    return parser
+
+
+async def work_set_from_args(args, engine, forms=False, done=(), window=20):
+    if args.no_discovery:
+        return WorkSet.legacy(args.ids, args.shard)
+    return await discover(engine, forms, args.ids, done, window, args.shard, args.report_orphans)
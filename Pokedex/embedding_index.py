@@ -0,0 +1,192 @@
+import argparse, hashlib, json, os, time
+import numpy as np
+
+from columnar_export import flatten_groups
+from pokedex_stream import iter_entries
+from search_index import tokenize
+
+MODEL = "hashing-v1"  # bump when chunking or features change: forces a full re-embed
+DEFAULT_DIM = 1024
+IVF_MIN_ROWS = 256  # below this brute force is as fast as probing
+
+
+def embedding_base(output_file):
+    return os.path.splitext(output_file)[0]
+
+
+# === CHUNKS ===
+# Two deterministic chunks per entry (and per form): a profile built from the
+# structured fields and the description. The content hash covers the model name,
+# so unchanged chunks keep their vectors across re-ingests.
+def _join(values):
+    return ", ".join(values) if values else "none"
+
+
+def entry_chunks(entry):
+    name = entry["name"]
+    lines = [f"{name} is a {'/'.join(entry.get('types') or [])} type Pokémon from {entry.get('generation')}."]
+    if entry.get("region_name"):
+        lines.append(f"It is known as the {entry['region_name']}.")
+    lines.append(f"Strong against: {_join(entry.get('strengths'))}. Weak to: {_join(entry.get('weaknesses'))}.")
+    if entry.get("evolves_from") or entry.get("evolves_to"):
+        evolves_to = entry.get("evolves_to")
+        evolves_to = evolves_to if isinstance(evolves_to, list) else [evolves_to] if evolves_to else []
+        lines.append(f"Evolves from: {entry.get('evolves_from') or 'none'}. "
+                     f"Evolves into: {_join([str(e) for e in evolves_to])}.")
+    elif entry.get("evolutions"):
+        lines.append(f"Evolution family: {_join(entry['evolutions'])}.")
+    chunks = [("profile", " ".join(lines))]
+    if entry.get("description"):
+        chunks.append(("description", f"{name}: {entry['description']}"))
+    for kind, text in chunks:
+        yield {
+            "chunk_id": f"{entry['id']}:{kind}",
+            "id": entry["id"],
+            "name": name,
+            "kind": kind,
+            "text": text,
+            "hash": hashlib.sha256(f"{MODEL}\n{text}".encode("utf-8")).hexdigest(),
+        }
+
+
+def build_chunks(entries):
+    rows = sorted({e["id"]: e for e in flatten_groups(entries)}.values(), key=lambda e: e["id"])
+    return [chunk for entry in rows for chunk in entry_chunks(entry)]
+
+
+# === HASHING VECTORIZER ===
+# Stateless (no fitted vocabulary or IDF), so a chunk's vector only depends on
+# its own text: that is what lets unchanged chunks be reused as-is. Unigrams +
+# bigrams, signed feature hashing via blake2b (stable across processes, unlike
+# hash()), sublinear term frequency, L2-normalized.
+def _features(text):
+    tokens = tokenize(text)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def embed_text(text, dim=DEFAULT_DIM):
+    counts = {}
+    for feature in _features(text):
+        digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        slot, sign = digest % dim, 1.0 if digest >> 63 else -1.0
+        counts[slot] = counts.get(slot, 0.0) + sign
+    vector = np.zeros(dim, dtype=np.float32)
+    if counts:
+        slots = np.fromiter(counts.keys(), dtype=np.int64)
+        values = np.fromiter(counts.values(), dtype=np.float32)
+        vector[slots] = np.sign(values) * np.log1p(np.abs(values))
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+    return vector
+
+
+# === IVF (inverted file) ===
+# Spherical k-means with a fixed seed: sqrt(n) centroids, rows stored grouped by
+# list so a probe reads contiguous slices.
+def build_ivf(matrix, iterations=10, seed=0):
+    n = len(matrix)
+    nlist = max(1, int(np.sqrt(n)))
+    rng = np.random.default_rng(seed)
+    centroids = matrix[rng.choice(n, nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(matrix @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = matrix[assign == c]
+            if len(members):
+                center = members.sum(axis=0)
+                centroids[c] = center / (np.linalg.norm(center) or 1.0)
+    assign = np.argmax(matrix @ centroids.T, axis=1)
+    order = np.argsort(assign, kind="stable")
+    offsets = np.searchsorted(assign[order], np.arange(nlist + 1))
+    return centroids.astype(np.float32), order.astype(np.int32), offsets.astype(np.int32)
+
+
+# === EXPORT (incremental) ===
+def write_embeddings(entries, base, dim=DEFAULT_DIM):
+    chunks = build_chunks(entries)
+    manifest_file, matrix_file = base + ".chunks.json", base + ".embeddings.npy"
+    previous = {}
+    if os.path.exists(manifest_file) and os.path.exists(matrix_file):
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("model") == MODEL and manifest.get("dim") == dim:
+            old = np.load(matrix_file, mmap_mode="r")
+            previous = {c["hash"]: old[row] for row, c in enumerate(manifest["chunks"])}
+
+    matrix = np.empty((len(chunks), dim), dtype=np.float32)
+    reused = 0
+    for row, chunk in enumerate(chunks):
+        vector = previous.get(chunk["hash"])
+        if vector is not None:
+            matrix[row] = vector
+            reused += 1
+        else:
+            matrix[row] = embed_text(chunk["text"], dim)
+
+    np.save(matrix_file + ".tmp.npy", matrix)
+    os.replace(matrix_file + ".tmp.npy", matrix_file)
+    if len(chunks) >= IVF_MIN_ROWS:
+        centroids, order, offsets = build_ivf(matrix)
+        np.savez(base + ".ivf.tmp.npz", centroids=centroids, order=order, offsets=offsets)
+        os.replace(base + ".ivf.tmp.npz", base + ".ivf.npz")
+    elif os.path.exists(base + ".ivf.npz"):
+        os.remove(base + ".ivf.npz")
+    with open(manifest_file + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"model": MODEL, "dim": dim, "chunks": chunks}, f, ensure_ascii=False, indent=0)
+    os.replace(manifest_file + ".tmp", manifest_file)
+    return len(chunks), reused
+
+
+def export_embeddings(output_file, source=None, dim=DEFAULT_DIM):
+    # Builder hook: chunks + vectors next to the JSON output
+    base = embedding_base(output_file)
+    count, reused = write_embeddings(iter_entries(source or output_file), base, dim)
+    print(f"🧠 Embeddings: {count} chunks -> {base}.embeddings.npy ({reused} reused, {count - reused} embedded)")
+    return base
+
+
+# === SIMILARITY SEARCH ===
+class EmbeddingIndex:
+    def __init__(self, base):
+        with open(base + ".chunks.json", "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.dim = manifest["dim"]
+        self.chunks = manifest["chunks"]
+        self.matrix = np.load(base + ".embeddings.npy", mmap_mode="r")
+        self.ivf = None
+        if os.path.exists(base + ".ivf.npz"):
+            with np.load(base + ".ivf.npz") as ivf:
+                self.ivf = (ivf["centroids"], ivf["order"], ivf["offsets"])
+
+    def search(self, text, k=5, nprobe=8):
+        query = embed_text(text, self.dim)
+        if self.ivf is None or nprobe is None:
+            rows = np.arange(len(self.chunks))
+        else:
+            centroids, order, offsets = self.ivf
+            lists = np.argsort(centroids @ query)[::-1][:nprobe]
+            rows = np.concatenate([order[offsets[c]:offsets[c + 1]] for c in lists])
+        scores = self.matrix[rows] @ query
+        top = np.argsort(scores)[::-1][:k]
+        return [(self.chunks[rows[t]], float(scores[t])) for t in top]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the local embedding index")
+    parser.add_argument("source", help="pokedex_*.json/.jsonl (builds/refreshes the index next to it)")
+    parser.add_argument("query", nargs="*", help="query words (none: only build/refresh the index)")
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    parser.add_argument("--exact", action="store_true", help="brute force instead of IVF probing")
+    cli = parser.parse_intermixed_args()  # options may sit anywhere among the query words
+    started = time.perf_counter()
+    base = export_embeddings(cli.source, dim=cli.dim)
+    print(f"⏱️ Export took {time.perf_counter() - started:.2f}s")
+    if cli.query:
+        index = EmbeddingIndex(base)
+        started = time.perf_counter()
+        results = index.search(" ".join(cli.query), nprobe=None if cli.exact else 8)
+        elapsed = time.perf_counter() - started
+        for chunk, score in results:
+            print(f"{score:.3f} #{chunk['id']:<5} [{chunk['kind']}] {chunk['text'][:90]}")
+        print(f"⏱️ query {1000 * elapsed:.2f} ms")
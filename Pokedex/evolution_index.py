@@ -0,0 +1,117 @@
+import asyncio, json, os
+from collections import deque
+
+from file_lock import locked
+
+DEFAULT_INDEX_FILE = ".evolution_index.json"
+
+
+# === EVOLUTION GRAPH INDEX ===
+# Every evolution chain is fetched once (concurrent requests for the same chain
+# share one in-flight task) and flattened into species -> parent / children
+# adjacency, so evolves_from / evolves_to / the full family are dict lookups.
+# Branching chains (Eevee, Tyrogue, Wurmple...) keep every branch.
+# Chains read from the persisted index are still loaded through the engine once
+# per run, so the response cache decides freshness (fresh hit, or a conditional
+# GET when stale / under --incremental); the persisted copy only answers when
+# that fetch fails.
+class EvolutionIndex:
+    def __init__(self):
+        self.parent = {}         # species -> species it evolves from (None for the base)
+        self.children = {}       # species -> species it evolves into
+        self.chain_members = {}  # chain url -> species in breadth-first order
+        self.chain_of = {}       # species -> chain url
+        self.current = set()     # chain urls loaded through the engine in this run
+        self._pending = {}
+        self.fetched = 0
+
+    # === BUILD ===
+    def add_chain(self, url, chain_json):
+        old = self.chain_members.get(url, [])
+        members = []
+        queue = deque([(chain_json.get("chain") or {}, None)])
+        while queue:
+            node, prev = queue.popleft()
+            if not node or not node.get("species"):
+                continue
+            name = node["species"]["name"]
+            members.append(name)
+            self.parent[name] = prev
+            self.children[name] = [evo["species"]["name"] for evo in node.get("evolves_to", [])]
+            self.chain_of[name] = url
+            queue.extend((evo, name) for evo in node.get("evolves_to", []))
+        self.chain_members[url] = members
+        for name in old:
+            if name not in members and self.chain_of.get(name) == url:
+                # dropped from a chain that changed upstream
+                del self.parent[name], self.chain_of[name]
+                self.children.pop(name, None)
+        self.current.add(url)
+        return members
+
+    async def load_chain(self, engine, url):
+        if url in self.current:
+            return self.chain_members[url]
+        task = self._pending.get(url)
+        if task is None:
+            task = self._pending[url] = asyncio.ensure_future(self._fetch(engine, url))
+        return await task
+
+    async def _fetch(self, engine, url):
+        evo_data = await engine.safe_request(url)
+        self._pending.pop(url, None)
+        if not evo_data:
+            return self.chain_members.get(url)  # persisted copy, if any
+        self.fetched += 1
+        return self.add_chain(url, evo_data)
+
+    # === LOOKUPS (species names as PokeAPI spells them) ===
+    def family(self, species):
+        return self.chain_members.get(self.chain_of.get(species), [])
+
+    def evolves_from(self, species):
+        return self.parent.get(species)
+
+    def evolves_to(self, species):
+        return self.children.get(species, [])
+
+    # === PERSISTENCE (shared across builds and builders) ===
+    # Concurrent builds (shards) each save their view: the file is re-read under
+    # a lock and only the chains loaded through the engine in this run replace
+    # what is on disk; chains this run never touched keep the other builds' copy.
+    def save(self, path=DEFAULT_INDEX_FILE):
+        with locked(path):
+            chains = {}
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    chains = json.load(f).get("chains", {})
+            for url, members in self.chain_members.items():
+                if url in self.current or url not in chains:
+                    chains[url] = [[name, self.parent[name]] for name in members]
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"chains": chains}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_FILE):
+        index = cls()
+        if not path or not os.path.exists(path):
+            return index
+        with open(path, "r", encoding="utf-8") as f:
+            chains = json.load(f).get("chains", {})
+        for url, pairs in chains.items():
+            index.chain_members[url] = [name for name, _ in pairs]
+            for name, parent in pairs:
+                index.parent[name] = parent
+                index.chain_of[name] = url
+                index.children.setdefault(name, [])
+                if parent is not None:
+                    index.children.setdefault(parent, []).append(name)
+        return index
+
+
+def add_evolution_arguments(parser):
+    parser.add_argument("--evolution-index", default=DEFAULT_INDEX_FILE,
+                        help="evolution graph index shared across builds ('' to rebuild in memory only)")
+    return parser
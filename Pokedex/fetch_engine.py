@@ -0,0 +1,243 @@
+import asyncio, hashlib, json, os, time, zlib
+import aiohttp
+
+from metrics import count, span
+from response_cache import DEFAULT_CACHE_FILE, DEFAULT_MAX_BYTES, DEFAULT_TTL, ResponseCache
+from retry_policy import (CircuitOpenError, RetryPolicy, add_retry_arguments, breaker_from_args, parse_retry_after,
+                          policy_from_args)
+
+# Point this at a local stand-in server (e.g. http://127.0.0.1:8080/api/v2) to build offline
+POKEAPI_BASE_URL = os.environ.get("POKEAPI_BASE_URL", "https://pokeapi.co/api/v2").rstrip("/")
+
+DEFAULT_CONCURRENCY = 10
+DEFAULT_RATE = 20.0  # requests per second across the whole build
+
+
+# === TOKEN BUCKET RATE LIMITER ===
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.max_rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return  # unlimited
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    # Adaptive pacing: halve the rate on a 429, creep back up on successes
+    def slow_down(self):
+        if self.rate > 0:
+            self.rate = max(1.0, self.rate / 2)
+
+    def speed_up(self):
+        if 0 < self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+# === FETCH ENGINE ===
+# One aiohttp session per build: keep-alive connections are pooled and reused for
+# every request, concurrency is capped by the connector + semaphore and pacing is
+# done by the token bucket instead of a fixed sleep between IDs. With a cache,
+# fresh entries never touch the network and stale ones are revalidated.
+class FetchEngine:
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, burst=None,
+                 timeout=15, retry_policy=None, breaker=None, base_url=POKEAPI_BASE_URL, cache=None):
+        self.concurrency = concurrency
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.policy = retry_policy or RetryPolicy()
+        self.breaker = breaker
+        self.permanent_failures = {}  # url -> status that will not change on retry (404...)
+        self.bucket = TokenBucket(rate, burst)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.cache = cache
+        self.digests = {}  # url -> sha256 of the last JSON body seen (source hashes)
+        self.chain_urls = {}  # species url -> its evolution-chain url (source hashes)
+        self.pinned = {}  # url -> [compressed body, uses left] (payloads handed over by discovery)
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency,
+                                         keepalive_timeout=30, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": "ai-training-pokedex-builder"},
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+        self.session = None
+        if self.cache:
+            print(self.cache.summary())
+            self.cache.close()
+
+    def api_url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def endpoint(self, url):
+        # Metrics label: "pokemon", "pokemon-species", "evolution-chain"... or "media"
+        if url.startswith(self.base_url + "/"):
+            return url[len(self.base_url) + 1:].split("?", 1)[0].split("/", 1)[0]
+        return "media"
+
+    def pin(self, url, body, uses):
+        # Serve `body` from memory for the next `uses` requests of `url`, e.g. one
+        # species payload shared by all of its forms, then forget it
+        if uses > 0:
+            self.pinned[url] = [zlib.compress(body, 1), uses]
+
+    def repin(self, url, uses):
+        # Adjust a pinned payload to `uses` requests left (0 drops it)
+        if url in self.pinned:
+            if uses > 0:
+                self.pinned[url][1] = uses
+            else:
+                del self.pinned[url]
+
+    def record_payload(self, url, payload, data):
+        # Digest (for --incremental source hashes) and evolution-chain link of a decoded JSON payload
+        self.digests[url] = hashlib.sha256(payload).hexdigest()
+        if isinstance(data, dict) and (data.get("evolution_chain") or {}).get("url"):
+            self.chain_urls[url] = data["evolution_chain"]["url"]
+
+    async def _get(self, url, endpoint):
+        # (status, body) on success, (status, Retry-After seconds or None) otherwise
+        pinned = self.pinned.get(url)
+        if pinned:
+            pinned[1] -= 1
+            if not pinned[1]:
+                del self.pinned[url]
+            count("pinned_hits", endpoint=endpoint)
+            return 200, zlib.decompress(pinned[0])
+
+        cached = self.cache.lookup(url) if self.cache else None
+        if cached and self.cache.is_fresh(cached):
+            self.cache.hits += 1
+            count("cache_hits", endpoint=endpoint)
+            return 200, cached.body
+
+        headers = cached.validators() if cached else None
+        status, guarded = None, False
+        with span("connection_wait"):
+            await self._semaphore.acquire()
+        try:
+            if self.breaker:
+                await self.breaker.acquire()  # raises CircuitOpenError while open
+                guarded = True
+            with span("rate_limit_wait"):
+                await self.bucket.acquire()
+            with span("http_response", endpoint=endpoint):
+                async with self.session.get(url, headers=headers) as r:
+                    status = r.status
+                    count("http_responses", endpoint=endpoint, status=r.status)
+                    if r.status == 304 and cached:
+                        self.cache.touch(url)
+                        self.cache.revalidated += 1
+                        count("cache_revalidated", endpoint=endpoint)
+                        return 200, cached.body
+                    if r.status != 200:
+                        return r.status, parse_retry_after(r.headers.get("Retry-After"))
+                    body = await r.read()
+        finally:
+            self._semaphore.release()
+            if guarded:
+                self.breaker.record(not self.policy.retryable(status))
+        count("http_bytes", len(body), endpoint=endpoint)
+        if self.cache:
+            self.cache.store(url, body, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+            self.cache.misses += 1
+            count("cache_misses", endpoint=endpoint)
+        return 200, body
+
+    async def _request(self, url, as_json):
+        endpoint = self.endpoint(url)
+        with span("request", endpoint=endpoint):
+            for attempt in range(self.policy.attempts):
+                if attempt:
+                    count("http_retries", endpoint=endpoint)
+                retry_after = None
+                try:
+                    with span("http_attempt", endpoint=endpoint):
+                        status, payload = await self._get(url, endpoint)
+                    if status == 200:
+                        self.bucket.speed_up()
+                        if not as_json:
+                            return payload
+                        with span("json_decode", endpoint=endpoint):
+                            data = json.loads(payload)
+                        self.record_payload(url, payload, data)
+                        return data
+                    if not self.policy.retryable(status):
+                        self.permanent_failures[url] = status
+                        count("http_failures", endpoint=endpoint, reason=f"http {status}")
+                        print(f"⛔ HTTP {status} on {url}, not retrying")
+                        return None
+                    if status == 429:
+                        self.bucket.slow_down()
+                    retry_after = payload
+                    print(f"⚠️ HTTP {status} on {url}, retrying...")
+                except CircuitOpenError:
+                    count("http_failures", endpoint=endpoint, reason="circuit open")
+                    return None  # fail fast; the ID goes to the dead-letter list
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    count("http_errors", endpoint=endpoint, error=type(e).__name__)
+                    print(f"⚠️ Error fetching {url}: {e!r}")
+                if attempt + 1 < self.policy.attempts:
+                    with span("retry_sleep", endpoint=endpoint):
+                        await asyncio.sleep(self.policy.delay(attempt, retry_after))
+            count("http_failures", endpoint=endpoint, reason="retries exhausted")
+            print(f"❌ Failed after {self.policy.attempts} attempts: {url}")
+            return None
+
+    # === SAFE REQUEST (JSON) ===
+    async def safe_request(self, url):
+        return await self._request(url, as_json=True)
+
+    # === RAW BYTES (artwork, sprites) ===
+    async def fetch_bytes(self, url):
+        return await self._request(url, as_json=False)
+
+
+# === CLI HELPERS shared by the builders ===
+def add_engine_arguments(parser):
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="max in-flight HTTP requests (pooled keep-alive connections)")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="token-bucket rate limit in requests/second (0 = unlimited)")
+    parser.add_argument("--burst", type=int, default=None,
+                        help="token-bucket burst size (defaults to the rate)")
+    parser.add_argument("--api-base", default=POKEAPI_BASE_URL,
+                        help="PokeAPI base URL, e.g. a local stand-in server")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_FILE,
+                        help="SQLite response cache file")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always go to the network")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL,
+                        help="seconds before a cached response is revalidated (0 = always revalidate)")
+    add_retry_arguments(parser)
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help="LRU-evict cached bodies beyond this size")
+    return parser
+
+
+def engine_from_args(args):
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(args.cache, ttl=args.cache_ttl, max_bytes=int(args.cache_max_mb * 1024 * 1024))
+    return FetchEngine(concurrency=args.concurrency, rate=args.rate, burst=args.burst,
+                       retry_policy=policy_from_args(args), breaker=breaker_from_args(args),
+                       base_url=args.api_base, cache=cache)
@@ -0,0 +1,34 @@
+import os, time
+from contextlib import contextmanager
+
+STALE_AFTER = 30.0  # seconds; a lock older than this was left by a crashed process
+
+
+# === FILE LOCK ===
+# Guards read-modify-write of files shared by concurrent builds (shards, or
+# several builders on one machine): <path>.lock is created exclusively, which
+# works the same on every OS and filesystem, and removed on exit.
+@contextmanager
+def locked(path, timeout=60.0, poll=0.05):
+    lock = path + ".lock"
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock) > STALE_AFTER:
+                    os.remove(lock)
+                    continue
+            except OSError:
+                continue  # released meanwhile
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"could not lock {path} (remove {lock} if no build is running)")
+            time.sleep(poll)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        os.remove(lock)
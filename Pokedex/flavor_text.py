@@ -0,0 +1,230 @@
+import argparse, functools, glob, hashlib, json, os, re
+
+from metrics import span
+from pokedex_stream import JsonlWriter, index_jsonl, read_entries_at
+
+NO_DESCRIPTION = "No description available."
+TEXTS_FIELD = "flavor_texts"  # stream: {text: ["language/version", ...]}
+ROW_FIELD = "flavor_row"  # output: the entry's row in its flavor table
+TABLE_FIELD = "flavor_table"  # output: content hash naming that table
+
+
+def flavor_path(output_file, digest):
+    return f"{os.path.splitext(output_file)[0]}.flavor.{digest}.json"
+
+
+def parse_languages(text):
+    # "en,ja" -> {"en", "ja"}; "all" -> None (every language)
+    languages = {part.strip().lower() for part in text.split(",") if part.strip()}
+    return None if not languages or "all" in languages else languages
+
+
+# === EXTRACTION ===
+# PokeAPI repeats the same text across many versions (red/blue, x/y, the
+# remakes...), and forms share their species' payload. Raw texts are normalized
+# through a bounded cache and kept once per entry with the list of
+# (language, version) slots they appear in.
+@functools.lru_cache(maxsize=8192)
+def normalize_flavor(text):
+    return text.replace("\n", " ").replace("\x0c", " ")
+
+
+def extract_flavor(species_data):
+    # -> (first English text as the entry's description, {text: ["language/version", ...]})
+    description, texts = None, {}
+    for entry in species_data.get("flavor_text_entries", []):
+        text = normalize_flavor(entry["flavor_text"])
+        language = entry["language"]["name"]
+        if description is None and language == "en":
+            description = text
+        texts.setdefault(text, []).append(f"{language}/{entry.get('version', {}).get('name', '')}")
+    return description or NO_DESCRIPTION, texts
+
+
+# === STRING TABLE ===
+# <output>.flavor.<digest>.json holds every distinct text once ("strings"),
+# every (language, version) pair once ("slots") and every distinct per-entry
+# list of (slot, string) pairs once, flattened ("rows"). An entry carries two
+# scalars whatever the number of versions, and forms sharing their species'
+# texts share its row:
+#   "flavor_row": 12, "flavor_table": "<digest>"
+# A table is named by its content hash and never rewritten in place, so an
+# entry always resolves through the table it was built against. Indexes follow
+# first appearance in ID order, so the same entries always produce the same
+# table (single builds, --merge of shards, --incremental).
+class FlavorTable:
+    def __init__(self, path):
+        self.path = path
+        self._data = None
+
+    @property
+    def data(self):
+        # Loaded on first access only
+        if self._data is None:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._data = json.load(f)
+            else:
+                self._data = {"version": 2, "slots": [], "strings": [], "rows": []}
+        return self._data
+
+    def texts(self, row, language=None):
+        # {language: {version: text}} for an entry's row, optionally one language only
+        if row is None or row >= len(self.data["rows"]):
+            return {}
+        slots, strings, pairs = self.data["slots"], self.data["strings"], self.data["rows"][row]
+        found = {}
+        for k in range(0, len(pairs), 2):
+            lang, version = slots[pairs[k]]
+            if language is None or lang == language:
+                found.setdefault(lang, {})[version] = strings[pairs[k + 1]]
+        return found
+
+    def text(self, row, language="en", version=None):
+        # One version's text, or the first one in `language`
+        versions = self.texts(row, language).get(language, {})
+        return versions.get(version) if version else next(iter(versions.values()), None)
+
+    def slotted(self, row):
+        # Inverse of FlavorTableWriter.row: {text: ["language/version", ...]}
+        texts = {}
+        for lang, versions in self.texts(row).items():
+            for version, text in versions.items():
+                texts.setdefault(text, []).append(f"{lang}/{version}")
+        return texts
+
+
+class FlavorTables:
+    # The tables next to an output, opened (lazily) per digest as entries name them
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self._tables = {}
+
+    def get(self, digest):
+        table = self._tables.get(digest)
+        if table is None:
+            table = self._tables[digest] = FlavorTable(flavor_path(self.output_file, digest))
+        return table
+
+
+class FlavorTableWriter:
+    def __init__(self, languages=None):
+        self.languages = languages
+        self.slots, self.strings, self.rows = [], [], []
+        self._slot_ids, self._string_ids, self._row_ids = {}, {}, {}
+        self.pairs = 0
+
+    def _intern(self, value, values, ids):
+        ref = ids.get(value)
+        if ref is None:
+            ref = ids[value] = len(values)
+            values.append(value)
+        return ref
+
+    def row(self, texts):
+        # {text: ["language/version", ...]} -> index of the row holding its sorted (slot, string) pairs
+        pairs = []
+        for text, slots in texts.items():
+            for slot in slots:
+                language, _, version = slot.partition("/")
+                if self.languages is None or language in self.languages:
+                    pairs.append((self._intern((language, version), self.slots, self._slot_ids),
+                                  self._intern(text, self.strings, self._string_ids)))
+        self.pairs += len(pairs)
+        return self._intern(tuple(ref for pair in sorted(pairs) for ref in pair), self.rows, self._row_ids)
+
+    def save(self, output_file):
+        # -> digest; the table is durable before any entry names it
+        body = json.dumps({"version": 2, "slots": [list(s) for s in self.slots], "strings": self.strings,
+                           "rows": [list(r) for r in self.rows]},
+                          ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+        path = flavor_path(output_file, digest)
+        if not os.path.exists(path):
+            with open(path + ".tmp", "wb") as f:
+                f.write(body)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+        return digest
+
+
+def prune_flavor_tables(output_file, keep):
+    # Run once the outputs are final: drops every table but `keep` (the one the
+    # stream names). With --jsonl-only the finalized JSON was not rewritten, so
+    # the table it still names is kept as well.
+    stem = os.path.splitext(output_file)[0]
+    tables = {}
+    for path in glob.glob(glob.escape(stem) + ".flavor.*.json"):
+        match = re.search(r"\.flavor\.([0-9a-f]+)\.json$", path)
+        if match and match.group(1) != keep:
+            tables[match.group(1)] = path
+    if tables and os.path.exists(output_file):
+        with open(output_file, "rb") as f:
+            data = f.read()
+        tables = {digest: path for digest, path in tables.items() if digest.encode() not in data}
+    for path in tables.values():
+        os.remove(path)
+
+
+# === BUILDER HOOK ===
+# Runs on the stream before it is finalized: the per-entry texts become one
+# row in a table next to the output. Entries carried over from the previous
+# output (--incremental) or a resumed stream already hold a row; it is
+# resolved through the table they name and re-interned. Two passes over the
+# stream (only the row indexes are kept in between): the new table is saved
+# under its hash, then the stream is rewritten to name it, in ID order (a
+# resumed stream's repeated IDs collapse to the last line, as in finalize). A
+# crash at any point leaves every entry pointing at a table that exists.
+# Returns the digest; the builder prunes older tables once its outputs are final.
+def export_flavor_table(args, stream_file, output_file):
+    previous = FlavorTables(output_file)
+    table = FlavorTableWriter(args.flavor_languages)
+    tmp = stream_file + ".flavor"
+    with span("flavor_table"):
+        index = index_jsonl(stream_file)
+        offsets = [index[i][0] for i in sorted(index)]
+        rows = []
+        for entry in read_entries_at(stream_file, offsets):
+            if TEXTS_FIELD in entry:
+                texts = entry[TEXTS_FIELD]
+            else:
+                texts = previous.get(entry.get(TABLE_FIELD)).slotted(entry.get(ROW_FIELD))
+            rows.append(table.row(texts))
+        digest = table.save(output_file)
+        with JsonlWriter(tmp, mode="w") as writer:
+            for entry, row in zip(read_entries_at(stream_file, offsets), rows):
+                entry.pop(TEXTS_FIELD, None)
+                entry[ROW_FIELD], entry[TABLE_FIELD] = row, digest
+                writer.write(entry)
+        os.replace(tmp, stream_file)
+    print(f"📜 Flavor text: {table.pairs} (language, version) texts -> {len(table.strings)} distinct strings "
+          f"in {len(table.slots)} slots, {len(table.rows)} rows ({flavor_path(output_file, digest)})")
+    return digest
+
+
+def add_flavor_arguments(parser):
+    parser.add_argument("--flavor-languages", type=parse_languages, default=None,
+                        help="languages kept in the flavor text table, e.g. en,ja,fr (default: all)")
+    return parser
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read the flavor text table of a generated Pokédex")
+    parser.add_argument("source", help="pokedex_*.json, .jsonl or .pdxc (its .flavor.<digest>.json tables sit next to it)")
+    parser.add_argument("id_or_name")
+    parser.add_argument("--language", default=None)
+    cli = parser.parse_args()
+
+    from pokedex_query import Pokedex
+    dex = Pokedex.load(cli.source)
+    record = dex.get(int(cli.id_or_name)) if cli.id_or_name.isdigit() else dex.get(cli.id_or_name)
+    if record is None:
+        raise SystemExit(f"❌ No Pokémon {cli.id_or_name!r} in {cli.source}")
+    for language, versions in dex.flavor_texts(record, cli.language).items():
+        for version, text in versions.items():
+            print(f"{language:<8} {version:<24} {text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,19 @@
-import requests, json, time, os
-from PIL import Image, ImageOps
-from io import BytesIO
+import argparse, asyncio
 from collections import defaultdict
 
+from atlas_packer import export_atlas
+from build_runner import add_build_arguments, run_build
+from columnar_export import export_columnar_output
+from embedding_index import export_embeddings
+from flavor_text import export_flavor_table, extract_flavor, prune_flavor_tables
+from metrics import instrumented, span
+from pokedex_stream import index_jsonl, iter_entries, jsonl_path, read_entries_at, write_json_array
+from search_index import export_search_index
+from sharding import merge_shards
+from type_effectiveness import strengths, weaknesses
+
 OUTPUT_FILE = "pokedex_flowise_ready.json"
-CHECKPOINT_FILE = "pokedex_checkpoint.json"
-SILHOUETTE_DIR = "silhouettes"
+JOURNAL_FILE = "pokedex_forms_checkpoint.jsonl"
 
 # === GENERATION MAPPING ===
 def get_generation(pokedex_id):
@@ -20,74 +28,12 @@ def get_generation(pokedex_id):
     else: return "Gen 9 (Paldea)"
 
 
-# === TYPE CHART ===
-TYPE_CHART = {
-    "Fire": {"strong": ["Grass", "Bug", "Ice", "Steel"], "weak": ["Water", "Rock", "Ground"]},
-    "Water": {"strong": ["Fire", "Ground", "Rock"], "weak": ["Electric", "Grass"]},
-    "Grass": {"strong": ["Water", "Ground", "Rock"], "weak": ["Fire", "Bug", "Ice", "Flying"]},
-    "Electric": {"strong": ["Water", "Flying"], "weak": ["Ground"]},
-    "Ice": {"strong": ["Dragon", "Grass", "Ground", "Flying"], "weak": ["Fire", "Rock", "Steel"]},
-    "Rock": {"strong": ["Fire", "Flying", "Bug", "Ice"], "weak": ["Water", "Grass", "Ground"]},
-    "Psychic": {"strong": ["Fighting", "Poison"], "weak": ["Dark", "Bug", "Ghost"]},
-    "Dark": {"strong": ["Psychic", "Ghost"], "weak": ["Fighting", "Fairy", "Bug"]},
-    "Fairy": {"strong": ["Dark", "Dragon", "Fighting"], "weak": ["Steel", "Poison"]},
-    "Dragon": {"strong": ["Dragon"], "weak": ["Ice", "Fairy", "Dragon"]},
-    "Steel": {"strong": ["Rock", "Ice", "Fairy"], "weak": ["Fire", "Ground", "Fighting"]},
-    "Ground": {"strong": ["Fire", "Rock", "Electric", "Steel"], "weak": ["Water", "Grass", "Ice"]},
-    "Poison": {"strong": ["Fairy", "Grass"], "weak": ["Ground", "Psychic"]},
-    "Bug": {"strong": ["Dark", "Psychic", "Grass"], "weak": ["Rock", "Flying", "Fire"]},
-    "Flying": {"strong": ["Bug", "Grass", "Fighting"], "weak": ["Rock", "Ice", "Electric"]},
-    "Fighting": {"strong": ["Dark", "Ice", "Rock"], "weak": ["Psychic", "Flying", "Fairy"]},
-    "Ghost": {"strong": ["Psychic", "Ghost"], "weak": ["Dark", "Ghost"]},
-    "Normal": {"strong": [], "weak": ["Fighting", "Ghost"]}
-}
-
-
-# === IMAGE PROCESSING: Silhouette generator (with cache check) ===
-def generate_silhouette(image_url, output_path):
-    try:
-        if os.path.exists(output_path):
-            print(f"🖼️ Cached silhouette: {output_path}")
-            return output_path
-
-        resp = requests.get(image_url, timeout=15)
-        if resp.status_code != 200:
-            print(f"⚠️ Image fetch failed: {image_url}")
-            return None
-
-        img = Image.open(BytesIO(resp.content)).convert("RGBA")
-        grayscale = img.convert("L")
-        silhouette = ImageOps.colorize(grayscale, black="black", white="black")
-        silhouette.putalpha(img.getchannel("A"))
-
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        silhouette.save(output_path)
-        print(f"✅ Created silhouette: {output_path}")
-        return output_path
-    except Exception as e:
-        print(f"⚠️ Silhouette error: {e}")
-        return None
-
-
-# === SAFE REQUEST with retry ===
-def safe_request(url, retries=3, delay=3):
-    for attempt in range(retries):
-        try:
-            r = requests.get(url, timeout=15)
-            if r.status_code == 200:
-                return r.json()
-            else:
-                print(f"⚠️ HTTP {r.status_code} on {url}, retrying...")
-        except Exception as e:
-            print(f"⚠️ Error fetching {url}: {e}")
-        time.sleep(delay)
-    return None
-
-
 # === FETCH SINGLE POKÉMON DATA ===
-def get_pokemon_data(name_or_id):
-    poke_data = safe_request(f"https://pokeapi.co/api/v2/pokemon/{name_or_id}")
-    species_data = safe_request(f"https://pokeapi.co/api/v2/pokemon-species/{name_or_id}")
+async def get_pokemon_data(engine, name_or_id, evo_index, pipeline, species_id=None):
+    poke_data, species_data = await asyncio.gather(
+        engine.safe_request(engine.api_url(f"pokemon/{name_or_id}")),
+        engine.safe_request(engine.api_url(f"pokemon-species/{species_id or name_or_id}")),
+    )
     if not poke_data or not species_data:
         return None
 
@@ -99,37 +45,26 @@ def get_pokemon_data(name_or_id):
     types = [t["type"]["name"].capitalize() for t in poke_data["types"]]
     sprite = poke_data["sprites"]["front_default"]
     artwork = poke_data["sprites"]["other"]["official-artwork"]["front_default"]
-    generation = get_generation(poke_id)
-
-    # Description (English only)
-    flavor_entries = species_data.get("flavor_text_entries", [])
-    description = next(
-        (entry["flavor_text"].replace("\n", " ").replace("\x0c", " ")
-         for entry in flavor_entries if entry["language"]["name"] == "en"),
-        "No description available."
-    )
+    generation = get_generation(species_id or poke_id)  # forms (IDs > 10000) take their species' generation
+
+    # Description (first English text) + every language/version's flavor text
+    description, flavor_texts = extract_flavor(species_data)
 
     # Evolution chain
+    # (each chain is fetched and parsed once, then shared through the index)
     evo_chain_url = species_data.get("evolution_chain", {}).get("url")
-    evo_list = []
     if evo_chain_url:
-        evo_data = safe_request(evo_chain_url)
-        if evo_data:
-            evo = evo_data["chain"]
-            while evo:
-                evo_list.append(evo["species"]["name"].capitalize())
-                evo = evo["evolves_to"][0] if evo["evolves_to"] else None
-
-    # Strengths & Weaknesses
-    strong, weak = set(), set()
-    for t in types:
-        if t in TYPE_CHART:
-            strong.update(TYPE_CHART[t]["strong"])
-            weak.update(TYPE_CHART[t]["weak"])
-
-    # Silhouette
-    silhouette_path = os.path.join(SILHOUETTE_DIR, f"{name}.png")
-    silhouette_file = generate_silhouette(artwork, silhouette_path)
+        await evo_index.load_chain(engine, evo_chain_url)
+    evo_list = [species.capitalize() for species in evo_index.family(species_data["name"])]
+
+    # Strengths & Weaknesses (precomputed single/dual type table; multipliers and immunities applied)
+    strong, weak = strengths(types), weaknesses(types)
+
+    # Silhouette (store lookup happens before the artwork download; forms sharing
+    # their base artwork share one rendered blob)
+    silhouette_file = await pipeline.silhouette(engine, artwork, name) if artwork else None
+    if silhouette_file:
+        print(f"🖼️ Silhouette: {silhouette_file}")
 
     pokemon = {
         "id": poke_id,
@@ -138,6 +73,7 @@ def get_pokemon_data(name_or_id):
         "generation": generation,
         "types": types,
         "description": description,
+        "flavor_texts": flavor_texts,
         "evolutions": evo_list,
         "strengths": sorted(list(strong)),
         "weaknesses": sorted(list(weak)),
@@ -149,27 +85,10 @@ def get_pokemon_data(name_or_id):
     return pokemon
 
 
-# === MAIN SCRIPT ===
-def main():
+# === FORM GROUPING ===
+def group_forms(entries):
     grouped_pokedex = defaultdict(lambda: {"forms": []})
-    start_id = 1
-
-    # Resume if checkpoint exists
-    if os.path.exists(CHECKPOINT_FILE):
-        with open(CHECKPOINT_FILE, "r") as f:
-            checkpoint = json.load(f)
-        grouped_pokedex.update(checkpoint.get("pokedex", {}))
-        start_id = checkpoint.get("last_id", 1) + 1
-        print(f"🔁 Resuming from ID #{start_id}")
-    else:
-        print("🚀 Starting new Pokédex build...")
-
-    for i in range(start_id, 1026):
-        data = get_pokemon_data(i)
-        if not data:
-            print(f"❌ Skipped #{i}")
-            continue
-
+    for data in entries:
         base = data["base_name"]
         if " " not in data["name"] and base.lower() == data["name"].lower():
             # Base form
@@ -177,25 +96,87 @@ def main():
         else:
             # Regional or alternate form
             grouped_pokedex[base]["forms"].append(data)
+    return grouped_pokedex
+
+
+def iter_existing(path):
+    # Flatten {"pokemon": [base + forms]} back into one entry per ID
+    if path.endswith(".jsonl"):
+        for entry in iter_entries(path):
+            if "base_name" not in entry:
+                print(f"⚠️ {path} was written by pokedex-builder.py, rebuilding everything")
+                return
+            yield entry
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        grouped = f.read(64).lstrip().startswith("{")
+    if not grouped:
+        # pokedex-builder.py writes a flat list to the same file; nothing to reuse
+        print(f"⚠️ {path} is not a grouped Pokédex, rebuilding everything")
+        return
+    for group in iter_entries(path):
+        if "id" in group:
+            yield {k: v for k, v in group.items() if k != "forms"}
+        yield from group.get("forms", [])
+
+
+def finalize_grouped(jsonl_file, json_file):
+    # Streams one base_name group at a time; groups keep first-seen (lowest ID) order
+    index = index_jsonl(jsonl_file, key=lambda entry: entry["base_name"])
+    members = defaultdict(list)
+    for i in sorted(index):
+        members[index[i][1]].append(i)
 
-        print(f"✅ Added #{i}: {data['name']}")
-        time.sleep(0.25)
+    def groups():
+        for base, ids in members.items():
+            yield group_forms(read_entries_at(jsonl_file, [index[i][0] for i in ids]))[base]
 
-        if i % 25 == 0:
-            with open(CHECKPOINT_FILE, "w", encoding="utf-8") as f:
-                json.dump({"last_id": i, "pokedex": grouped_pokedex}, f, indent=2, ensure_ascii=False)
-            print(f"💾 Checkpoint saved at #{i}")
+    with span("finalize_json"):
+        return write_json_array(json_file, groups(), wrap_key="pokemon")
 
-    # Convert defaultdict to normal dict
-    pokedex_output = {"pokemon": list(grouped_pokedex.values())}
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(pokedex_output, f, indent=2, ensure_ascii=False)
+def entry_silhouette(entry):
+    return entry.get("silhouette")
 
-    if os.path.exists(CHECKPOINT_FILE):
-        os.remove(CHECKPOINT_FILE)
 
-    print(f"\n🎉 Done! Saved {len(grouped_pokedex)} Pokémon (with forms) to {OUTPUT_FILE}")
+# === MAIN SCRIPT ===
+async def build(args):
+    if args.merge:
+        count, journal = merge_shards(OUTPUT_FILE, JOURNAL_FILE, remove=not args.keep_shards), None
+    else:
+        count, journal = await run_build(args, get_pokemon_data, JOURNAL_FILE, OUTPUT_FILE,
+                                         iter_existing, entry_silhouette, forms=True, soft_edges=True)
+        if args.shard:
+            if journal.finish():
+                print(f"\n🧩 Shard done: {count} entries; run with --merge once every shard has finished")
+            else:
+                print(f"\n🧩 Shard incomplete: {count} entries; re-run it before --merge")
+            return
+
+    flavor_table = export_flavor_table(args, jsonl_path(OUTPUT_FILE), OUTPUT_FILE)
+    if args.atlas:
+        await export_atlas(args, jsonl_path(OUTPUT_FILE))
+    if args.jsonl_only:
+        print(f"\n🎉 Done! Streamed {count} Pokémon entries to {jsonl_path(OUTPUT_FILE)}")
+    else:
+        groups = finalize_grouped(jsonl_path(OUTPUT_FILE), OUTPUT_FILE)
+        print(f"\n🎉 Done! Saved {groups} Pokémon (with forms) to {OUTPUT_FILE}")
+    if args.columnar:
+        export_columnar_output(OUTPUT_FILE, jsonl_path(OUTPUT_FILE))
+    if args.search_index:
+        export_search_index(OUTPUT_FILE, jsonl_path(OUTPUT_FILE))
+    if args.embeddings:
+        export_embeddings(OUTPUT_FILE, jsonl_path(OUTPUT_FILE))
+    prune_flavor_tables(OUTPUT_FILE, flavor_table)
+    if journal:
+        journal.finish()
+
+
+def main():
+    parser = add_build_arguments(argparse.ArgumentParser(description="Build pokedex_flowise_ready.json grouped by base form"))
+    args = parser.parse_args()
+    with instrumented(args):
+        asyncio.run(build(args))
 
 
 if __name__ == "__main__":
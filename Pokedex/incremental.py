@@ -0,0 +1,101 @@
+import asyncio, hashlib, json, os
+
+SOURCES_SUFFIX = ".sources.json"
+
+
+# === SOURCE HASHES ===
+# Sidecar per builder, named after its journal (pokedex-builder.py and
+# generate_full_pokedex_wforms.py write the same output file, so hashes keyed by
+# the output would mix the two): {id: sha256 over the pokemon, species and
+# evolution-chain payloads the entry was built from}, so a new evolution added
+# to an existing line (a new generation) changes the hash of the whole family.
+# Written by every build so the next --incremental run has something to
+# compare against.
+def sources_file(journal_file):
+    return os.path.splitext(journal_file)[0] + SOURCES_SUFFIX
+
+
+def load_source_hashes(journal_file):
+    path = sources_file(journal_file)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return {int(k): v for k, v in json.load(f).items()}
+
+
+def save_source_hashes(journal_file, hashes):
+    path = sources_file(journal_file)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({str(k): hashes[k] for k in sorted(hashes)}, f, indent=0)
+    os.replace(path + ".tmp", path)
+
+
+def source_urls(engine, poke_id, species_id=None):
+    # Alternate forms (IDs above 10000) are built from their species' payload;
+    # the chain URL is known once the species payload has been seen
+    species_url = engine.api_url(f"pokemon-species/{species_id or poke_id}")
+    urls = [engine.api_url(f"pokemon/{poke_id}"), species_url]
+    if species_url in engine.chain_urls:
+        urls.append(engine.chain_urls[species_url])
+    return urls
+
+
+_digest_requests = {}  # (engine, url) -> in-flight request
+
+
+async def _fetch_digest(engine, url):
+    # A family's species all point at one chain: concurrent checks share one request
+    key = (engine, url)
+    task = _digest_requests.get(key)
+    if task is None:
+        task = _digest_requests[key] = asyncio.ensure_future(engine.safe_request(url))
+        task.add_done_callback(lambda _: _digest_requests.pop(key, None))
+    await task
+
+
+async def source_hash(engine, poke_id, species_id=None):
+    # Reuses the digests recorded while the entry was fetched; only asks the
+    # engine (cache first, then a conditional GET) for payloads it has not seen.
+    # Two rounds: the species payload names the evolution chain.
+    for _ in range(2):
+        urls = source_urls(engine, poke_id, species_id)
+        missing = [url for url in urls if url not in engine.digests]
+        if missing:
+            await asyncio.gather(*(_fetch_digest(engine, url) for url in missing))
+    urls = source_urls(engine, poke_id, species_id)
+    if any(url not in engine.digests for url in urls):
+        return None
+    return hashlib.sha256("".join(engine.digests[url] for url in urls).encode()).hexdigest()
+
+
+# === INCREMENTAL PLAN ===
+# Splits the work set into IDs whose existing entry can be kept as-is and IDs
+# to rebuild: new IDs, entries whose upstream payloads changed, and entries
+# whose silhouette file is gone. `existing` maps id -> silhouette file,
+# `species` maps a pokemon id to its species id and `present` tells whether a
+# silhouette file is there (or deferred by a lazy build).
+async def plan_incremental(engine, ids, existing, hashes, window=20, species=lambda i: i, present=os.path.exists):
+    keep, rebuild = set(), []
+    counts = {"unchanged": 0, "changed": 0, "new": 0, "missing silhouette": 0}
+    slots = asyncio.Semaphore(window)
+
+    async def check(i):
+        async with slots:
+            return i, await source_hash(engine, i, species(i))
+
+    for future in asyncio.as_completed([check(i) for i in ids if i in existing]):
+        i, digest = await future
+        path = existing[i]
+        if digest is None or digest != hashes.get(i):
+            counts["changed"] += 1
+            rebuild.append(i)
+        elif not path or not present(path):
+            counts["missing silhouette"] += 1
+            rebuild.append(i)
+        else:
+            counts["unchanged"] += 1
+            keep.add(i)
+    new_ids = [i for i in ids if i not in existing]
+    counts["new"] = len(new_ids)
+    print("♻️ Incremental: " + ", ".join(f"{n} {label}" for label, n in counts.items()))
+    return keep, sorted(rebuild) + new_ids
@@ -0,0 +1,177 @@
+import cProfile, io, json, os, pstats, time, tracemalloc
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_SAMPLES = 10000  # raw samples kept per series for exact percentiles
+PREFIX = "pokedex_"
+
+
+def _labels_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _labels_text(key):
+    return ",".join(f'{k}="{v}"' for k, v in key)
+
+
+def _braces(labels):
+    return f"{{{labels}}}" if labels else ""
+
+
+# === HISTOGRAM ===
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "max", "samples")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count, self.sum, self.max = 0, 0.0, 0.0
+        self.samples = []
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(value)
+
+    def percentile(self, q):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self):
+        return {"count": self.count, "sum": round(self.sum, 6), "max": round(self.max, 6),
+                "p50": self.percentile(0.50), "p95": self.percentile(0.95), "p99": self.percentile(0.99)}
+
+
+# === REGISTRY ===
+# Counters and latency histograms keyed by (name, labels). Spans time a block
+# (sync or async code alike, `with span(...)`) into the `<name>_seconds`
+# histogram. Concurrent spans overlap, so per-stage totals are busy time, not
+# wall time.
+class Metrics:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counters = defaultdict(float)
+        self.histograms = defaultdict(Histogram)
+        self.started = time.time()
+
+    def count(self, name, value=1, **labels):
+        self.counters[(name, _labels_key(labels))] += value
+
+    def observe(self, name, seconds, **labels):
+        self.histograms[(name, _labels_key(labels))].observe(seconds)
+
+    @contextmanager
+    def span(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    # --- exporters ---
+    def to_dict(self):
+        counters, histograms = defaultdict(dict), defaultdict(dict)
+        for (name, key), value in sorted(self.counters.items()):
+            counters[name][_labels_text(key)] = value
+        for (name, key), hist in sorted(self.histograms.items()):
+            histograms[name + "_seconds"][_labels_text(key)] = hist.summary()
+        return {"started": self.started, "elapsed_seconds": round(time.time() - self.started, 3),
+                "counters": counters, "histograms": histograms, "stages": self.stages()}
+
+    def to_prometheus(self):
+        lines = []
+        for name in sorted({n for n, _ in self.counters}):
+            lines.append(f"# TYPE {PREFIX}{name}_total counter")
+            for (n, key), value in sorted(self.counters.items()):
+                if n == name:
+                    lines.append(f"{PREFIX}{name}_total{_braces(_labels_text(key))} {value:g}")
+        for name in sorted({n for n, _ in self.histograms}):
+            metric = f"{PREFIX}{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for (n, key), hist in sorted(self.histograms.items()):
+                if n != name:
+                    continue
+                labels = _labels_text(key)
+                sep = "," if labels else ""
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), hist.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+                lines.append(f"{metric}_sum{_braces(labels)} {hist.sum:.6f}")
+                lines.append(f"{metric}_count{_braces(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def stages(self):
+        # Busy time per span name, largest first
+        totals = defaultdict(lambda: [0.0, 0])
+        for (name, _), hist in self.histograms.items():
+            totals[name][0] += hist.sum
+            totals[name][1] += hist.count
+        return {name: {"seconds": round(s, 3), "count": n}
+                for name, (s, n) in sorted(totals.items(), key=lambda item: -item[1][0])}
+
+    def write(self, path):
+        # .prom / .txt -> Prometheus text exposition format, anything else -> JSON
+        body = (self.to_prometheus() if path.endswith((".prom", ".txt"))
+                else json.dumps(self.to_dict(), indent=2, ensure_ascii=False))
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(body)
+        os.replace(path + ".tmp", path)
+
+    def report(self, top=8):
+        stages = list(self.stages().items())[:top]
+        if not stages:
+            return "⏱️ No stages recorded"
+        return "⏱️ Busy time by stage: " + ", ".join(f"{name} {v['seconds']:.1f}s/{v['count']}" for name, v in stages)
+
+
+METRICS = Metrics()
+span, count, observe = METRICS.span, METRICS.count, METRICS.observe
+
+
+# === PROFILING / CLI ===
+@contextmanager
+def instrumented(args):
+    # Wraps a whole build: optional cProfile / tracemalloc capture, metrics file on exit
+    profiler = cProfile.Profile() if args.profile else None
+    if args.tracemalloc:
+        tracemalloc.start(25)
+    if profiler:
+        profiler.enable()
+    try:
+        yield METRICS
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(15)
+            print(out.getvalue())
+            print(f"🔬 cProfile stats saved to {args.profile} (open with python -m pstats or snakeviz)")
+        if args.tracemalloc:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"🔬 tracemalloc: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB; top allocations:")
+            for stat in snapshot.statistics("lineno")[:10]:
+                print(f"   {stat}")
+        print(METRICS.report())
+        if args.metrics:
+            METRICS.write(args.metrics)
+            print(f"📈 Metrics written to {args.metrics}")
+
+
+def add_metrics_arguments(parser):
+    parser.add_argument("--metrics", default=None,
+                        help="write timings/counters on exit (.prom/.txt = Prometheus text, else JSON)")
+    parser.add_argument("--profile", default=None, help="capture a cProfile of the whole run to this file")
+    parser.add_argument("--tracemalloc", action="store_true", help="trace allocations and report the top sites")
+    return parser
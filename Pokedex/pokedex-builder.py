@@ -1,14 +1,25 @@
-import requests, json, time, os, concurrent.futures
-from PIL import Image, ImageOps
-from io import BytesIO
+import argparse, asyncio, os
+
+from atlas_packer import export_atlas
+from build_runner import add_build_arguments, run_build
+from columnar_export import export_columnar_output
+from embedding_index import export_embeddings
+from flavor_text import export_flavor_table, extract_flavor, prune_flavor_tables
+from metrics import instrumented
+from pokedex_stream import finalize_json_array, iter_entries, jsonl_path
+from search_index import export_search_index
+from sharding import merge_shards
+from type_effectiveness import strengths, weaknesses
 
 OUTPUT_FILE = "pokedex_flowise_ready.json"
-CHECKPOINT_FILE = "pokedex_checkpoint.json"
+JOURNAL_FILE = "pokedex_flowise_checkpoint.jsonl"
 SILHOUETTE_DIR = "silhouettes"
 os.makedirs(SILHOUETTE_DIR, exist_ok=True)
 
 # === CONFIG ===
-SILHOUETTE_BASE_URL = "/silhouettes/"  # 👈 change this to your hosting URL
+# Defaults match the routes of pokedex_server.py; set to your hosting URL to serve them elsewhere
+SILHOUETTE_BASE_URL = os.environ.get("SILHOUETTE_BASE_URL", "/silhouettes/")
+ATLAS_BASE_URL = os.environ.get("ATLAS_BASE_URL", "/atlas/")  # texture atlases + atlas.json (--atlas)
 
 # === GENERATION MAPPING ===
 def get_generation(pokedex_id):
@@ -22,83 +33,24 @@ def get_generation(pokedex_id):
     elif pokedex_id <= 905: return "Gen 8 (Galar)"
     else: return "Gen 9 (Paldea)"
 
-# === TYPE CHART ===
-TYPE_CHART = {
-    "Fire": {"strong": ["Grass", "Bug", "Ice", "Steel"], "weak": ["Water", "Rock", "Ground"]},
-    "Water": {"strong": ["Fire", "Ground", "Rock"], "weak": ["Electric", "Grass"]},
-    "Grass": {"strong": ["Water", "Ground", "Rock"], "weak": ["Fire", "Bug", "Ice", "Flying"]},
-    "Electric": {"strong": ["Water", "Flying"], "weak": ["Ground"]},
-    "Ice": {"strong": ["Dragon", "Grass", "Ground", "Flying"], "weak": ["Fire", "Rock", "Steel"]},
-    "Rock": {"strong": ["Fire", "Flying", "Bug", "Ice"], "weak": ["Water", "Grass", "Ground"]},
-    "Psychic": {"strong": ["Fighting", "Poison"], "weak": ["Dark", "Bug", "Ghost"]},
-    "Dark": {"strong": ["Psychic", "Ghost"], "weak": ["Fighting", "Fairy", "Bug"]},
-    "Fairy": {"strong": ["Dark", "Dragon", "Fighting"], "weak": ["Steel", "Poison"]},
-    "Dragon": {"strong": ["Dragon"], "weak": ["Ice", "Fairy", "Dragon"]},
-    "Steel": {"strong": ["Rock", "Ice", "Fairy"], "weak": ["Fire", "Ground", "Fighting"]},
-    "Ground": {"strong": ["Fire", "Rock", "Electric", "Steel"], "weak": ["Water", "Grass", "Ice"]},
-    "Poison": {"strong": ["Fairy", "Grass"], "weak": ["Ground", "Psychic"]},
-    "Bug": {"strong": ["Dark", "Psychic", "Grass"], "weak": ["Rock", "Flying", "Fire"]},
-    "Flying": {"strong": ["Bug", "Grass", "Fighting"], "weak": ["Rock", "Ice", "Electric"]},
-    "Fighting": {"strong": ["Dark", "Ice", "Rock"], "weak": ["Psychic", "Flying", "Fairy"]},
-    "Ghost": {"strong": ["Psychic", "Ghost"], "weak": ["Dark", "Ghost"]},
-    "Normal": {"strong": [], "weak": ["Fighting", "Ghost"]}
-}
-
-# === SAFE REQUEST ===
-def safe_request(url, retries=3, delay=3):
-    for attempt in range(retries):
-        try:
-            r = requests.get(url, timeout=15)
-            if r.status_code == 200:
-                return r.json()
-        except Exception as e:
-            print(f"⚠️ Error fetching {url}: {e}")
-        time.sleep(delay)
-    return None
-
 # === SILHOUETTE CREATOR ===
-def create_silhouette(url, poke_name):
+def silhouette_filename_from_url(url):
+    return f"{SILHOUETTE_DIR}/{os.path.basename(url)}"
+
+async def create_silhouette(engine, pipeline, url, poke_name):
     if not url:
         return None
-    filename = f"{SILHOUETTE_DIR}/{poke_name.lower().replace(' ', '_')}.png"
-    if os.path.exists(filename):
+    filename = await pipeline.silhouette(engine, url, poke_name)
+    if filename:
         return f"{SILHOUETTE_BASE_URL}{os.path.basename(filename)}"
-    try:
-        img_data = requests.get(url, timeout=15).content
-        img = Image.open(BytesIO(img_data)).convert("RGBA")
-        gray = ImageOps.grayscale(img)
-        black = ImageOps.colorize(gray, black="black", white="black")
-        black.putalpha(img.getchannel("A"))
-        black.save(filename)
-        return f"{SILHOUETTE_BASE_URL}{os.path.basename(filename)}"
-    except Exception as e:
-        print(f"⚠️ Silhouette error for {poke_name}: {e}")
-        return None
-
-# === EVOLUTION PARSER (simplified) ===
-def parse_evolution_chain(evo_json, target_name):
-    evolves_from, evolves_to = None, []
-    try:
-        def traverse(node, prev=None):
-            nonlocal evolves_from, evolves_to
-            if not node or not node.get("species"):
-                return
-            current_name = node["species"]["name"].capitalize()
-            if current_name == target_name:
-                if prev:
-                    evolves_from = prev
-                evolves_to = [evo["species"]["name"].capitalize() for evo in node.get("evolves_to", [])]
-            for evo in node.get("evolves_to", []):
-                traverse(evo, current_name)
-        traverse(evo_json.get("chain", {}))
-    except Exception as e:
-        print(f"⚠️ Evolution parse error for {target_name}: {e}")
-    return evolves_from, evolves_to
+    return None
 
 # === POKÉMON DATA ===
-def get_pokemon_data(poke_id):
-    poke_data = safe_request(f"https://pokeapi.co/api/v2/pokemon/{poke_id}")
-    species_data = safe_request(f"https://pokeapi.co/api/v2/pokemon-species/{poke_id}")
+async def get_pokemon_data(engine, poke_id, evo_index, pipeline, species_id=None):
+    poke_data, species_data = await asyncio.gather(
+        engine.safe_request(engine.api_url(f"pokemon/{poke_id}")),
+        engine.safe_request(engine.api_url(f"pokemon-species/{species_id or poke_id}")),
+    )
     if not poke_data or not species_data:
         return None
 
@@ -111,24 +63,21 @@ def get_pokemon_data(poke_id):
     region_name = next((g["genus"] for g in species_data.get("genera", [])
                         if g["language"]["name"] == "en"), None)
 
-    desc = next((entry["flavor_text"].replace("\n", " ").replace("\x0c", " ")
-                 for entry in species_data["flavor_text_entries"]
-                 if entry["language"]["name"] == "en"), "No description available.")
+    desc, flavor_texts = extract_flavor(species_data)
 
+    # Evolution edges come straight from the shared index (one fetch per chain)
     evo_url = species_data.get("evolution_chain", {}).get("url")
-    evolves_from, evolves_to = None, []
     if evo_url:
-        evo_data = safe_request(evo_url)
-        if evo_data:
-            evolves_from, evolves_to = parse_evolution_chain(evo_data, name)
+        await evo_index.load_chain(engine, evo_url)
+    species = species_data["name"]
+    parent = evo_index.evolves_from(species)
+    evolves_from = parent.capitalize() if parent else None
+    evolves_to = [child.capitalize() for child in evo_index.evolves_to(species)]
 
-    strong, weak = set(), set()
-    for t in types:
-        if t in TYPE_CHART:
-            strong.update(TYPE_CHART[t]["strong"])
-            weak.update(TYPE_CHART[t]["weak"])
+    # Strengths & Weaknesses (precomputed single/dual type table; multipliers and immunities applied)
+    strong, weak = strengths(types), weaknesses(types)
 
-    silhouette_url = create_silhouette(artwork, name)
+    silhouette_url = await create_silhouette(engine, pipeline, artwork, name)
 
     return {
         "id": poke_id,
@@ -137,6 +86,7 @@ def get_pokemon_data(poke_id):
         "region_name": region_name,
         "types": types,
         "description": desc,
+        "flavor_texts": flavor_texts,
         "strengths": sorted(strong),
         "weaknesses": sorted(weak),
         "evolves_from": evolves_from,
@@ -147,43 +97,60 @@ def get_pokemon_data(poke_id):
     }
 
 # === MAIN ===
-def main():
-    pokedex = []
-    start_id = 1
-
-    if os.path.exists(CHECKPOINT_FILE):
-        with open(CHECKPOINT_FILE, "r") as f:
-            checkpoint = json.load(f)
-        pokedex = checkpoint.get("pokedex", [])
-        start_id = checkpoint.get("last_id", 1) + 1
-        print(f"🔁 Resuming from ID #{start_id} ({len(pokedex)} entries saved)")
+def iter_existing(path):
+    # generate_full_pokedex_wforms.py writes the same file as grouped {"pokemon": [...]}
+    # entries (base_name / silhouette); nothing in that schema can be reused here
+    if not path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read(64).lstrip().startswith("{"):
+                print(f"⚠️ {path} is a grouped Pokédex, rebuilding everything")
+                return
+    for entry in iter_entries(path):
+        if "base_name" in entry:
+            print(f"⚠️ {path} was written by generate_full_pokedex_wforms.py, rebuilding everything")
+            return
+        yield entry
+
+def entry_silhouette(entry):
+    url = entry.get("silhouette_url")
+    return silhouette_filename_from_url(url) if url else None
+
+async def build(args):
+    if args.merge:
+        count, journal = merge_shards(OUTPUT_FILE, JOURNAL_FILE, remove=not args.keep_shards), None
     else:
-        print("🚀 Starting new Pokédex build...")
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        futures = {executor.submit(get_pokemon_data, i): i for i in range(start_id, 1026)}
-        for future in concurrent.futures.as_completed(futures):
-            i = futures[future]
-            try:
-                data = future.result()
-                if data:
-                    pokedex.append(data)
-                    print(f"✅ Added #{i}: {data['name']}")
-                else:
-                    print(f"❌ Skipped #{i}")
-            except Exception as e:
-                print(f"⚠️ Error on #{i}: {e}")
-            if i % 25 == 0:
-                with open(CHECKPOINT_FILE, "w", encoding="utf-8") as f:
-                    json.dump({"last_id": i, "pokedex": pokedex}, f, indent=2, ensure_ascii=False)
-                print(f"💾 Checkpoint saved at #{i}")
-
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(pokedex, f, indent=2, ensure_ascii=False)
-    if os.path.exists(CHECKPOINT_FILE):
-        os.remove(CHECKPOINT_FILE)
-    print(f"\n🎉 Done! Saved {len(pokedex)} Pokémon entries to {OUTPUT_FILE}")
+        count, journal = await run_build(args, get_pokemon_data, JOURNAL_FILE, OUTPUT_FILE,
+                                         iter_existing, entry_silhouette, soft_edges=True)
+        if args.shard:
+            if journal.finish():
+                print(f"\n🧩 Shard done: {count} entries; run with --merge once every shard has finished")
+            else:
+                print(f"\n🧩 Shard incomplete: {count} entries; re-run it before --merge")
+            return
+
+    flavor_table = export_flavor_table(args, jsonl_path(OUTPUT_FILE), OUTPUT_FILE)
+    if args.atlas:
+        await export_atlas(args, jsonl_path(OUTPUT_FILE), ATLAS_BASE_URL, "atlas_url")
+    output = jsonl_path(OUTPUT_FILE) if args.jsonl_only else OUTPUT_FILE
+    if not args.jsonl_only:
+        finalize_json_array(jsonl_path(OUTPUT_FILE), OUTPUT_FILE)
+    if args.columnar:
+        export_columnar_output(OUTPUT_FILE, jsonl_path(OUTPUT_FILE))
+    if args.search_index:
+        export_search_index(OUTPUT_FILE, jsonl_path(OUTPUT_FILE))
+    if args.embeddings:
+        export_embeddings(OUTPUT_FILE, jsonl_path(OUTPUT_FILE))
+    prune_flavor_tables(OUTPUT_FILE, flavor_table)
+    if journal:
+        journal.finish()
+    print(f"\n🎉 Done! Saved {count} Pokémon entries to {output}")
     print(f"🖤 Silhouette URLs prefixed with: {SILHOUETTE_BASE_URL}")
 
+def main():
+    parser = add_build_arguments(argparse.ArgumentParser(description="Build pokedex_flowise_ready.json"))
+    args = parser.parse_args()
+    with instrumented(args):
+        asyncio.run(build(args))
+
 if __name__ == "__main__":
     main()
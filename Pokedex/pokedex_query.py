@@ -0,0 +1,274 @@
+import argparse, re, time
+from collections import defaultdict
+
+from columnar_export import ColumnarPokedex, flatten_groups, normalize_name
+from flavor_text import ROW_FIELD, TABLE_FIELD, FlavorTables
+from pokedex_stream import iter_entries
+
+GENERATION_PATTERN = re.compile(r"Gen\s*(\d+)(?:\s*\((.+)\))?")
+
+
+# === RECORDS ===
+# One normalized record per ID whatever schema it came from: metadata
+# (`evolutions` family list), flowise (`evolves_from` / `evolves_to`, `*_url`)
+# or grouped forms (`base_name`, forms flattened). Fields a schema lacks stay
+# None / empty; keys not covered here are kept in `extra`.
+class PokemonRecord:
+    __slots__ = ("id", "name", "base_name", "form", "generation", "region", "region_name", "types",
+                 "description", "strengths", "weaknesses", "evolves_from", "evolves_to", "family",
+                 "sprite", "artwork", "silhouette", "flavor_row", "flavor_table", "extra")
+
+    def __repr__(self):
+        return f"<PokemonRecord #{self.id} {self.name}>"
+
+
+_KNOWN = {"id", "name", "base_name", "generation", "region_name", "types", "description", "strengths",
+          "weaknesses", "evolves_from", "evolves_to", "evolutions", "sprite", "sprite_url", "artwork",
+          "artwork_url", "image", "silhouette", "silhouette_url", ROW_FIELD, TABLE_FIELD}
+
+
+def _as_list(value):
+    if value is None:
+        return ()
+    return tuple(value) if isinstance(value, list) else (value,)
+
+
+def make_record(entry):
+    record = PokemonRecord()
+    record.id = entry["id"]
+    record.name = entry["name"]
+    record.base_name = entry.get("base_name") or entry["name"]
+    is_base = " " not in record.name and record.base_name.lower() == record.name.lower()
+    record.form = None if is_base else record.name
+    match = GENERATION_PATTERN.match(entry.get("generation") or "")
+    record.generation = int(match.group(1)) if match else None
+    record.region = match.group(2) if match else None
+    record.region_name = entry.get("region_name")
+    record.types = tuple(entry.get("types") or ())
+    record.description = entry.get("description")
+    record.strengths = tuple(entry.get("strengths") or ())
+    record.weaknesses = tuple(entry.get("weaknesses") or ())
+    record.evolves_from = entry.get("evolves_from")
+    record.evolves_to = _as_list(entry.get("evolves_to"))
+    record.family = tuple(entry.get("evolutions") or ())
+    record.sprite = entry.get("sprite") or entry.get("sprite_url")
+    record.artwork = entry.get("artwork") or entry.get("artwork_url") or entry.get("image")
+    record.silhouette = entry.get("silhouette") or entry.get("silhouette_url")
+    record.flavor_row = entry.get(ROW_FIELD)
+    record.flavor_table = entry.get(TABLE_FIELD)
+    record.extra = {k: v for k, v in entry.items() if k not in _KNOWN} or None
+    return record
+
+
+# === FILTERS ===
+# A filter resolves to a set of IDs straight from the indexes; & | ~ combine
+# them as set operations, so a query never scans records unless it uses where().
+class Filter:
+    __slots__ = ("resolve",)
+
+    def __init__(self, resolve):
+        self.resolve = resolve
+
+    def __and__(self, other):
+        return Filter(lambda dex: self.resolve(dex) & other.resolve(dex))
+
+    def __or__(self, other):
+        return Filter(lambda dex: self.resolve(dex) | other.resolve(dex))
+
+    def __invert__(self):
+        return Filter(lambda dex: dex.all_ids - self.resolve(dex))
+
+    def __sub__(self, other):
+        return Filter(lambda dex: self.resolve(dex) - other.resolve(dex))
+
+
+def _all_of(index_name, keys):
+    def resolve(dex):
+        index = getattr(dex, index_name)
+        sets = sorted((index.get(dex.key(k), set()) for k in keys), key=len)
+        return set(sets[0]).intersection(*sets[1:]) if sets else set(dex.all_ids)
+    return Filter(resolve)
+
+
+def of_type(*types):
+    return _all_of("by_type", types)
+
+
+def in_generation(*generations):
+    return Filter(lambda dex: set().union(*(dex.by_generation.get(int(g), ()) for g in generations)))
+
+
+def strong_against(*types):
+    return _all_of("by_strength", types)
+
+
+def weak_to(*types):
+    return _all_of("by_weakness", types)
+
+
+def forms_of(base_name):
+    return Filter(lambda dex: set(dex.by_base.get(dex.key(base_name), ())))
+
+
+def is_form():
+    return Filter(lambda dex: set(dex.form_ids))
+
+
+def evolves_from(name):
+    return Filter(lambda dex: set(dex.by_evolves_from.get(dex.key(name), ())))
+
+
+def evolves_to(name):
+    return Filter(lambda dex: set(dex.by_evolves_to.get(dex.key(name), ())))
+
+
+def same_family(name):
+    return Filter(lambda dex: set(dex.by_family.get(dex.key(name), ())))
+
+
+def where(predicate):
+    # Escape hatch: full scan over the records
+    return Filter(lambda dex: {i for i, r in dex.records.items() if predicate(r)})
+
+
+# === POKÉDEX ===
+class Pokedex:
+    def __init__(self, entries, flavor=None):
+        # Later entries win, matching the streamed .jsonl semantics
+        self.flavor = flavor  # FlavorTables, each table read on its first lookup
+        self.records = {}
+        for entry in flatten_groups(entries):
+            self.records[entry["id"]] = make_record(entry)
+        self.records = dict(sorted(self.records.items()))
+        self.all_ids = frozenset(self.records)
+        self._build_indexes()
+
+    @classmethod
+    def load(cls, path):
+        if path.endswith(".pdxc"):
+            with ColumnarPokedex(path) as dex:
+                return cls([dex.row(row) for row in range(len(dex))], FlavorTables(path))
+        return cls(iter_entries(path), FlavorTables(path))
+
+    @staticmethod
+    def key(text):
+        return normalize_name(str(text))
+
+    def _build_indexes(self):
+        self.by_name = {}
+        self.by_type, self.by_generation = defaultdict(set), defaultdict(set)
+        self.by_strength, self.by_weakness = defaultdict(set), defaultdict(set)
+        self.by_base, self.form_ids = defaultdict(set), set()
+        self.by_evolves_from, self.by_evolves_to = defaultdict(set), defaultdict(set)
+        self.by_family = defaultdict(set)
+        key = self.key
+        for i, r in self.records.items():
+            self.by_name.setdefault(key(r.name), i)
+            for t in r.types:
+                self.by_type[key(t)].add(i)
+            if r.generation is not None:
+                self.by_generation[r.generation].add(i)
+            for t in r.strengths:
+                self.by_strength[key(t)].add(i)
+            for t in r.weaknesses:
+                self.by_weakness[key(t)].add(i)
+            self.by_base[key(r.base_name)].add(i)
+            if r.form:
+                self.form_ids.add(i)
+        # Evolution edges: explicit evolves_from / evolves_to where the schema has
+        # them (IDs in evolves_to are resolved to names), otherwise the family list
+        for i, r in self.records.items():
+            if r.evolves_from:
+                self.by_evolves_from[key(r.evolves_from)].add(i)
+            for target in r.evolves_to:
+                if isinstance(target, int):
+                    target = self.records[target].name if target in self.records else None
+                if target:
+                    self.by_evolves_to[key(target)].add(i)
+        # Families: union-find over the family lists and the evolution edges
+        parent = {i: i for i in self.records}
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, r in self.records.items():
+            for member in r.family + tuple(self._linked(r)):
+                j = self.by_name.get(key(member))
+                if j is not None:
+                    parent[find(j)] = find(i)
+        groups = defaultdict(set)
+        for i in self.records:
+            groups[find(i)].add(i)
+        for i in self.records:
+            self.by_family[key(self.records[i].name)] = groups[find(i)]
+
+    def _linked(self, record):
+        names = [record.evolves_from] if record.evolves_from else []
+        names += [t for t in record.evolves_to if isinstance(t, str)]
+        return names
+
+    # --- lookups ---
+    def get(self, id_or_name):
+        if isinstance(id_or_name, int):
+            return self.records.get(id_or_name)
+        i = self.by_name.get(self.key(id_or_name))
+        return self.records[i] if i is not None else None
+
+    def select(self, query):
+        return [self.records[i] for i in sorted(query.resolve(self))]
+
+    def count(self, query):
+        return len(query.resolve(self))
+
+    def family(self, name):
+        return self.select(same_family(name))
+
+    # --- flavor text (the .flavor.<digest>.json table each record names) ---
+    def _flavor_table(self, record):
+        return self.flavor.get(record.flavor_table) if self.flavor and record.flavor_row is not None else None
+
+    def flavor_texts(self, record, language=None):
+        # {language: {version: text}}
+        table = self._flavor_table(record)
+        return table.texts(record.flavor_row, language) if table else {}
+
+    def description(self, record, language="en", version=None):
+        # One version's text in `language`; the entry's own description otherwise
+        table = self._flavor_table(record)
+        text = table.text(record.flavor_row, language, version) if table else None
+        return text or (record.description if language == "en" and not version else None)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query a generated Pokédex file")
+    parser.add_argument("source", help="pokedex_*.json, .jsonl or .pdxc")
+    parser.add_argument("--type", action="append", default=[])
+    parser.add_argument("--generation", type=int, action="append", default=[])
+    parser.add_argument("--weak-to", action="append", default=[])
+    parser.add_argument("--strong-against", action="append", default=[])
+    parser.add_argument("--forms-of")
+    cli = parser.parse_args()
+
+    started = time.perf_counter()
+    dex = Pokedex.load(cli.source)
+    loaded = time.perf_counter()
+    query = of_type(*cli.type) & weak_to(*cli.weak_to) & strong_against(*cli.strong_against)
+    if cli.generation:
+        query &= in_generation(*cli.generation)
+    if cli.forms_of:
+        query &= forms_of(cli.forms_of)
+    results = dex.select(query)
+    queried = time.perf_counter()
+    for r in results:
+        print(f"#{r.id:<5} {r.name:<24} Gen {r.generation}  {'/'.join(r.types)}")
+    print(f"🔎 {len(results)} matches | load {1000 * (loaded - started):.1f} ms, "
+          f"query {1e6 * (queried - loaded):.0f} µs")
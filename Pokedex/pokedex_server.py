@@ -0,0 +1,382 @@
+import argparse, asyncio, gzip, hashlib, json, os, re, time
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+from aiohttp import web
+
+from atlas_packer import ATLAS_DIR
+from columnar_export import ColumnarPokedex, flatten_groups
+from fetch_engine import add_engine_arguments, engine_from_args
+from flavor_text import FlavorTables, flavor_path
+from metrics import METRICS, count, observe
+from pokedex_query import (Filter, Pokedex, evolves_from, evolves_to, forms_of, in_generation, is_form, of_type,
+                           same_family, strong_against, weak_to)
+from pokedex_stream import iter_entries
+from silhouette_pipeline import add_pipeline_arguments, pipeline_from_args
+from silhouette_store import SilhouetteStore
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+LIST_CACHE_SIZE = 256  # distinct list queries kept precompressed
+STATIC_CACHE_SIZE = 4096  # silhouette / atlas files kept in memory
+MIN_COMPRESS = 256  # smaller bodies are sent as-is
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)  # preference order
+
+
+def _any_of(make):
+    # Filter factory taking one name -> one taking several, matching any of them
+    def build(*names):
+        query = make(names[0])
+        for name in names[1:]:
+            query = query | make(name)
+        return query
+    return build
+
+
+# Query parameter -> filter. Types, weaknesses and strengths must all match;
+# names (forms_of, evolution links, family) match any of the given ones.
+ROUTE_FILTERS = {"type": of_type, "weak_to": weak_to, "strong_against": strong_against,
+                 "forms_of": _any_of(forms_of), "evolves_from": _any_of(evolves_from),
+                 "evolves_to": _any_of(evolves_to), "family": _any_of(same_family)}
+
+
+def _entity_tag(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+# === PRECOMPRESSED BODIES ===
+# Every response body is encoded once (identity, gzip and, when the brotli
+# module is installed, br) and reused for every request. Each encoding is its
+# own representation with its own strong ETag ("<hash>", "<hash>-gzip",
+# "<hash>-br"); the hash is taken over the content, so it is stable across
+# restarts and identical on every server holding the same build.
+class Body:
+    __slots__ = ("content_type", "encodings", "tags", "cache_control")
+
+    def __init__(self, data, content_type, compress=True, cache_control="no-cache"):
+        tag = _entity_tag(data)
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.encodings = {"identity": data}
+        if compress and len(data) >= MIN_COMPRESS:
+            self.encodings["gzip"] = gzip.compress(data, compresslevel=9, mtime=0)
+            if brotli:
+                self.encodings["br"] = brotli.compress(data, quality=11)
+        self.tags = {encoding: f'"{tag}"' if encoding == "identity" else f'"{tag}-{encoding}"'
+                     for encoding in self.encodings}
+
+    @classmethod
+    def raw_json(cls, data):
+        return cls(data, "application/json")
+
+    def negotiate(self, accept_encoding):
+        # br > gzip > identity among the encodings the client accepts (q=0 excludes one)
+        accepted = {}
+        for part in accept_encoding.lower().split(","):
+            name, _, params = part.strip().partition(";")
+            q = params.strip()[2:] if params.strip().startswith("q=") else "1"
+            try:
+                accepted[name.strip()] = float(q)
+            except ValueError:
+                accepted[name.strip()] = 1.0
+        for encoding in ENCODINGS:
+            if encoding in self.encodings and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding
+        return "identity"
+
+    def matches(self, if_none_match):
+        # Weak comparison (RFC 9110 13.1.2): any representation's tag revalidates the resource
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        sent = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return not sent.isdisjoint(self.tags.values())
+
+    def response(self, request):
+        encoding = self.negotiate(request.headers.get("Accept-Encoding", ""))
+        headers = {"ETag": self.tags[encoding], "Vary": "Accept-Encoding", "Cache-Control": self.cache_control}
+        if self.matches(request.headers.get("If-None-Match")):
+            count("http_not_modified")
+            return web.Response(status=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return web.Response(body=self.encodings[encoding], content_type=self.content_type, headers=headers)
+
+
+def _lru_put(cache, key, value, limit):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > limit:
+        cache.popitem(last=False)
+
+
+# === SERVER ===
+# Read-only API over one build output, loaded once at startup:
+#   GET /pokemon/{id|name}          one entry, exactly as the builder wrote it
+#   GET /pokemon?type=fire&generation=1&weak_to=water&strong_against=grass
+#              &forms_of=charizard&evolves_from=&evolves_to=&family=&form=true|false
+#              &limit=&offset=      {"count", "results"}; repeated or comma-separated
+#                                   values: types/weaknesses/strengths must all match,
+#                                   generations/names any
+#   GET /silhouettes/{file}         silhouette store aliases (pending ones rendered with --render-missing)
+#   GET /atlas/{file}               atlas sheets and atlas.json
+#   GET /flavor/{digest}            the flavor text table an entry names in "flavor_table"
+#                                   (its "flavor_row" indexes "rows"); immutable, named by content
+#   GET /__stats                    p50/p95/p99 latency per route, status counts, cache hits
+#   GET /metrics                    the same in Prometheus text format
+# Entry bodies are serialized and compressed at load; list bodies on first use,
+# then kept in an LRU keyed by the normalized query.
+class PokedexServer:
+    def __init__(self, source, host="127.0.0.1", port=8080, silhouette_dir=None, atlas_dir=ATLAS_DIR,
+                 max_age=0, renderer=None):
+        self.source = source
+        self.host, self.port = host, port
+        self.silhouette_dir, self.atlas_dir = silhouette_dir, atlas_dir
+        self.static_cache_control = f"public, max-age={max_age}" if max_age else "no-cache"
+        self.renderer = renderer  # async (alias) -> path, or None
+        self.lists, self.static = OrderedDict(), OrderedDict()
+        self.rendering = {}
+        self.runner = None
+
+    # --- loading ---
+    def load(self):
+        started = time.perf_counter()
+        if self.source.endswith(".pdxc"):
+            with ColumnarPokedex(self.source) as columns:
+                entries = [columns.row(row) for row in range(len(columns))]
+        else:
+            entries = list(flatten_groups(iter_entries(self.source)))
+        self.dex = Pokedex(entries, FlavorTables(self.source))
+        self.raw = {entry["id"]: json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                    for entry in entries}
+        self.bodies = {i: Body.raw_json(self.raw[i]) for i in self.dex.records}
+        self.store = SilhouetteStore(self.silhouette_dir) if self.silhouette_dir else None
+        stored = sum(len(data) for body in self.bodies.values() for data in body.encodings.values())
+        print(f"📚 Loaded {len(self.bodies)} entries from {self.source} in {time.perf_counter() - started:.2f}s "
+              f"({stored / 1e6:.1f} MB with identity + {' + '.join(ENCODINGS)} bodies)")
+        return self
+
+    # --- handlers ---
+    async def handle_pokemon(self, request):
+        key = request.match_info["key"]
+        record = self.dex.get(int(key)) if key.isdigit() else self.dex.get(key)
+        if record is None:
+            return self.error(404, f"no Pokémon {key!r}")
+        return self.bodies[record.id].response(request)
+
+    def parse_query(self, query):
+        # -> (normalized cache key, Filter, offset, limit)
+        params = {}
+        for name, value in query.items():
+            params.setdefault(name, []).extend(v.strip() for v in value.split(",") if v.strip())
+        unknown = set(params) - set(ROUTE_FILTERS) - {"generation", "form", "limit", "offset"}
+        if unknown:
+            raise ValueError(f"unknown parameter(s): {', '.join(sorted(unknown))}")
+        selected = Filter(lambda dex: set(dex.all_ids))
+        for name, make in ROUTE_FILTERS.items():
+            if params.get(name):
+                selected = selected & make(*params[name])
+        if params.get("generation"):
+            selected = selected & in_generation(*(int(g) for g in params["generation"]))
+        if params.get("form"):
+            flag = params["form"][-1].lower()
+            if flag not in ("true", "false", "1", "0"):
+                raise ValueError("form must be true or false")
+            selected = selected & is_form() if flag in ("true", "1") else selected - is_form()
+        offset = int(params.get("offset", ["0"])[-1])
+        limit = int(params["limit"][-1]) if params.get("limit") else None
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("limit and offset must be >= 0")
+        key = tuple(sorted((name, tuple(sorted(self.dex.key(v) for v in values)))
+                           for name, values in params.items() if values))
+        return key, selected, offset, limit
+
+    async def handle_list(self, request):
+        try:
+            key, selected, offset, limit = self.parse_query(request.query)
+        except ValueError as e:
+            return self.error(400, str(e))
+        body = self.lists.get(key)
+        if body is None:
+            count("list_cache_misses")
+            ids = sorted(selected.resolve(self.dex))
+            page = ids[offset:offset + limit if limit is not None else None]
+            data = (b'{"count":' + str(len(ids)).encode() + b',"results":['
+                    + b",".join(self.raw[i] for i in page) + b"]}")
+            body = Body.raw_json(data)
+            _lru_put(self.lists, key, body, LIST_CACHE_SIZE)
+        else:
+            count("list_cache_hits")
+            self.lists.move_to_end(key)
+        return body.response(request)
+
+    async def handle_silhouette(self, request):
+        if not self.silhouette_dir:
+            return self.error(404, "no silhouette directory configured")
+        file = os.path.basename(request.match_info["file"])
+        path = os.path.join(self.silhouette_dir, file)
+        alias = os.path.splitext(file)[0]
+        if not os.path.exists(path) and self.renderer and self.pending_artwork(alias):
+            # Deferred by a --lazy-silhouettes build: render once, concurrent requests share the render
+            task = self.rendering.get(alias) or self.rendering.setdefault(alias, asyncio.ensure_future(self.renderer(alias)))
+            try:
+                await task
+            finally:
+                self.rendering.pop(alias, None)
+            self.store = SilhouetteStore(self.silhouette_dir)
+        return self.static_file(request, path, "image/png")
+
+    def pending_artwork(self, alias):
+        entry = self.store.manifest["pokemon"].get(alias) if self.store else None
+        return bool(entry and entry.get("artwork") and not entry.get("blob"))
+
+    async def handle_flavor(self, request):
+        digest = request.match_info["digest"]
+        if not re.fullmatch(r"[0-9a-f]+", digest):
+            return self.error(404, f"no flavor table {digest!r}")
+        return self.static_file(request, flavor_path(self.source, digest), "application/json",
+                                "public, max-age=31536000, immutable")
+
+    async def handle_atlas(self, request):
+        file = os.path.basename(request.match_info["file"])
+        content_type = "application/json" if file.endswith(".json") else "image/png"
+        return self.static_file(request, os.path.join(self.atlas_dir, file), content_type)
+
+    def static_file(self, request, path, content_type, cache_control=None):
+        # Cached by (path, mtime, size) so rebuilt files are picked up without a restart
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return self.error(404, f"no file {os.path.basename(path)!r}")
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        body = self.static.get(key)
+        if body is None:
+            with open(path, "rb") as f:
+                data = f.read()
+            body = Body(data, content_type, compress=content_type == "application/json",
+                        cache_control=cache_control or self.static_cache_control)
+            _lru_put(self.static, key, body, STATIC_CACHE_SIZE)
+        else:
+            self.static.move_to_end(key)
+        return body.response(request)
+
+    async def handle_stats(self, request):
+        routes, statuses = {}, {}
+        for (name, labels), hist in sorted(METRICS.histograms.items()):
+            if name == "http_request":
+                summary = hist.summary()
+                routes[dict(labels)["route"]] = {
+                    "count": summary["count"], "max_ms": round(summary["max"] * 1000, 3),
+                    **{q + "_ms": round(summary[q] * 1000, 3) for q in ("p50", "p95", "p99")}}
+        for (name, labels), value in sorted(METRICS.counters.items()):
+            if name == "http_responses":
+                statuses[dict(labels)["status"]] = int(value)
+        counters = {name: int(value) for (name, labels), value in METRICS.counters.items()
+                    if name in ("http_not_modified", "list_cache_hits", "list_cache_misses")}
+        return web.json_response({"entries": len(self.bodies), "uptime_seconds": round(time.time() - METRICS.started, 1),
+                                  "latency": routes, "responses": statuses, **counters,
+                                  "list_cache": len(self.lists), "static_cache": len(self.static)})
+
+    async def handle_metrics(self, request):
+        return web.Response(text=METRICS.to_prometheus(), content_type="text/plain")
+
+    @staticmethod
+    def error(status, message):
+        return web.json_response({"error": message}, status=status)
+
+    @web.middleware
+    async def timed(self, request, handler):
+        # Latency per route template (/pokemon/{key}), not per URL, so the series stay bounded
+        started = time.perf_counter()
+        try:
+            response = await handler(request)
+        except web.HTTPException as e:
+            response = e
+        resource = request.match_info.route.resource
+        route = resource.canonical if resource else "unmatched"
+        observe("http_request", time.perf_counter() - started, route=route)
+        count("http_responses", status=response.status)
+        if isinstance(response, web.HTTPException):
+            raise response
+        return response
+
+    # --- lifecycle ---
+    def app(self):
+        app = web.Application(middlewares=[self.timed])
+        app.router.add_get("/pokemon", self.handle_list)
+        app.router.add_get("/pokemon/{key}", self.handle_pokemon)
+        app.router.add_get("/silhouettes/{file}", self.handle_silhouette)
+        app.router.add_get("/atlas/{file}", self.handle_atlas)
+        app.router.add_get("/flavor/{digest}", self.handle_flavor)
+        app.router.add_get("/__stats", self.handle_stats)
+        app.router.add_get("/metrics", self.handle_metrics)
+        return app
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+
+async def serve(cli):
+    async with AsyncExitStack() as stack:
+        renderer = None
+        if cli.render_missing:
+            engine = await stack.enter_async_context(engine_from_args(cli))
+            pipeline = await stack.enter_async_context(pipeline_from_args(cli, not cli.hard_edges))
+
+            async def renderer(alias):
+                url = pipeline.store.pending().get(alias)
+                if url is None:
+                    return None
+                path = await pipeline.silhouette(engine, url, alias.split(".")[0], lazy=False)
+                pipeline.store.save()
+                return path
+
+        server = PokedexServer(cli.source, cli.host, cli.port, cli.silhouette_dir, cli.atlas_dir,
+                               cli.max_age, renderer).load()
+        await stack.enter_async_context(server)
+        print(f"🌐 Pokédex API on http://{server.host}:{server.port}/pokemon — stats at /__stats")
+        while True:
+            await asyncio.sleep(3600)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-only HTTP API over a generated Pokédex")
+    parser.add_argument("source", help="pokedex_*.json, .jsonl or .pdxc")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--atlas-dir", default=ATLAS_DIR)
+    parser.add_argument("--max-age", type=int, default=0,
+                        help="Cache-Control max-age for silhouettes and atlas files (default: always revalidate)")
+    parser.add_argument("--render-missing", action="store_true",
+                        help="render silhouettes deferred by --lazy-silhouettes builds when first requested")
+    parser.add_argument("--hard-edges", action="store_true", help="render generate_full_pokedex.py's variant")
+    add_pipeline_arguments(parser)
+    add_engine_arguments(parser)
+    cli = parser.parse_args()
+    try:
+        asyncio.run(serve(cli))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
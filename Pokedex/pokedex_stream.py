@@ -0,0 +1,155 @@
+import json, os
+
+from metrics import span
+
+CHUNK_SIZE = 1 << 16
+
+
+def jsonl_path(output_file):
+    return os.path.splitext(output_file)[0] + ".jsonl"
+
+
+def repair_jsonl(path):
+    # Truncates a torn tail left by a crash (partial last line, or a line that
+    # does not parse) so appended entries start on a clean line; bytes dropped
+    if not os.path.exists(path):
+        return 0
+    valid_bytes = 0
+    with open(path, "rb") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            if raw.strip():
+                try:
+                    json.loads(raw)
+                except ValueError:
+                    break
+            valid_bytes += len(raw)
+    dropped = os.path.getsize(path) - valid_bytes
+    if dropped:
+        with open(path, "r+b") as f:
+            f.truncate(valid_bytes)
+        print(f"🩹 Dropped a torn tail of {dropped} bytes from {path}")
+    return dropped
+
+
+# === STREAMING WRITER ===
+# Entries are appended as JSON Lines the moment they complete, so the build
+# never holds the whole Pokédex and consumers can start reading early.
+# Appending to an existing stream (a resume) first repairs its tail. Lines are
+# flushed to the OS as written; sync() makes them durable (the checkpoint
+# journal calls it before each of its own fsyncs).
+class JsonlWriter:
+    def __init__(self, path, mode="a"):
+        self.path = path
+        if mode == "a":
+            repair_jsonl(path)
+        self._file = open(path, mode, encoding="utf-8")
+        self.count = 0
+
+    def write(self, entry):
+        with span("stream_write"):
+            self._file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._file.flush()
+        self.count += 1
+
+    def sync(self):
+        if not self._file.closed:
+            with span("stream_fsync"):
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        self.sync()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# === STREAMING READER ===
+# Yields one entry at a time from a .jsonl file or from the array inside a JSON
+# file ([...] or {"pokemon": [...]}), decoding incrementally in fixed-size chunks.
+def iter_entries(path):
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_array(f)
+
+
+def _iter_json_array(f):
+    decoder = json.JSONDecoder()
+    buf = ""
+    while "[" not in buf:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        buf += chunk
+    buf = buf[buf.index("[") + 1:]
+    while True:
+        buf = buf.lstrip(" \t\r\n,")
+        if buf.startswith("]"):
+            return
+        try:
+            entry, end = decoder.raw_decode(buf)
+        except ValueError:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                raise
+            buf += chunk
+            continue
+        yield entry
+        buf = buf[end:]
+
+
+# === RANDOM ACCESS INTO A JSONL FILE ===
+def index_jsonl(path, key=None):
+    # {id: (byte offset, key(entry))}; a later line for the same ID wins
+    index = {}
+    with open(path, "rb") as f:
+        offset = 0
+        for raw in f:
+            if raw.strip():
+                entry = json.loads(raw)
+                index[entry["id"]] = (offset, key(entry) if key else None)
+            offset += len(raw)
+    return index
+
+
+def read_entries_at(path, offsets):
+    with open(path, "rb") as f:
+        for offset in offsets:
+            f.seek(offset)
+            yield json.loads(f.readline())
+
+
+# === FINALIZED JSON OUTPUT ===
+# Writes the same layout as json.dump(items, indent=2), one item at a time,
+# optionally wrapped as {"<wrap_key>": [...]}; replaced atomically at the end.
+def write_json_array(path, items, wrap_key=None):
+    tmp = path + ".tmp"
+    pad = "    " if wrap_key else "  "
+    count = 0
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(f'{{\n  "{wrap_key}": [' if wrap_key else "[")
+        for item in items:
+            body = json.dumps(item, indent=2, ensure_ascii=False).replace("\n", "\n" + pad)
+            f.write(("," if count else "") + "\n" + pad + body)
+            count += 1
+        closing = ("\n  ]" if count else "]") if wrap_key else ("\n]" if count else "]")
+        f.write(closing + ("\n}" if wrap_key else ""))
+    os.replace(tmp, path)
+    return count
+
+
+def finalize_json_array(jsonl_file, json_file):
+    with span("finalize_json"):
+        index = index_jsonl(jsonl_file)
+        offsets = [index[i][0] for i in sorted(index)]
+        return write_json_array(json_file, read_entries_at(jsonl_file, offsets))
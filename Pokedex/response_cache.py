@@ -0,0 +1,146 @@
+import hashlib, os, sqlite3, time, zlib
+
+DEFAULT_CACHE_FILE = os.environ.get("POKEAPI_CACHE_FILE", ".pokeapi_cache.sqlite")
+DEFAULT_TTL = 7 * 24 * 3600          # serve without revalidating for a week
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # compressed bodies, LRU-evicted beyond this
+BUSY_TIMEOUT = 5.0  # seconds to wait for another process (a concurrent --shard) holding the write lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key           TEXT PRIMARY KEY,
+    url           TEXT NOT NULL,
+    body          BLOB NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    fetched_at    REAL NOT NULL,
+    accessed_at   REAL NOT NULL,
+    size          INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at);
+"""
+
+
+def cache_key(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+class CachedResponse:
+    __slots__ = ("url", "body", "etag", "last_modified", "fetched_at")
+
+    def __init__(self, url, body, etag, last_modified, fetched_at):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def validators(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+# === RESPONSE CACHE ===
+# URL-keyed (sha256) store of zlib-compressed bodies plus their validators.
+# Entries younger than the TTL are served straight from disk; older ones are
+# revalidated with a conditional GET and refreshed in place on 304.
+# Concurrent builds (--shard) share the file: WAL lets readers run alongside a
+# writer, every write commits at once, and a lock held past the busy timeout
+# (or any other SQLite error) makes a lookup a miss and a write a no-op instead
+# of failing the fetch.
+class ResponseCache:
+    def __init__(self, path=DEFAULT_CACHE_FILE, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.hits = self.revalidated = self.misses = self.evicted = self.errors = 0
+
+    def _failed(self, error):
+        self.db.rollback()
+        self.errors += 1
+        if self.errors == 1:
+            print(f"⚠️ Response cache: {error}; failed lookups count as misses, failed writes are skipped")
+        return None
+
+    def lookup(self, url):
+        key = cache_key(url)
+        try:
+            row = self.db.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            return self._failed(e)
+        if not row:
+            return None
+        try:
+            # LRU bookkeeping only: the body is served even if this write is locked out
+            self.db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+        except sqlite3.Error as e:
+            self._failed(e)
+        return CachedResponse(url, zlib.decompress(row[0]), row[1], row[2], row[3])
+
+    def is_fresh(self, entry):
+        return time.time() - entry.fetched_at < self.ttl
+
+    def store(self, url, body, etag=None, last_modified=None):
+        key = cache_key(url)
+        blob = zlib.compress(body, 6)
+        now = time.time()
+        try:
+            old = self.db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, blob, etag, last_modified, now, now, len(blob)),
+            )
+            self.db.commit()
+        except sqlite3.Error as e:
+            return self._failed(e)
+        self.total_bytes += len(blob) - (old[0] if old else 0)
+        self.evict()
+
+    def touch(self, url):
+        # 304 Not Modified: the stored body is still current
+        now = time.time()
+        try:
+            self.db.execute("UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE key = ?",
+                            (now, now, cache_key(url)))
+            self.db.commit()
+        except sqlite3.Error as e:
+            self._failed(e)
+
+    def evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+        try:
+            rows = self.db.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+            evicted, total = 0, self.total_bytes
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+            self.db.commit()
+        except sqlite3.Error as e:
+            return self._failed(e)
+        self.total_bytes, self.evicted = total, self.evicted + evicted
+
+    def summary(self):
+        return (f"🗄️ Cache: {self.hits} fresh hits, {self.revalidated} revalidated (304), "
+                f"{self.misses} fetched, {self.evicted} evicted, {self.total_bytes / 1e6:.1f} MB on disk"
+                + (f", {self.errors} lock/IO errors bypassed" if self.errors else ""))
+
+    def close(self):
+        try:
+            self.db.commit()
+        finally:
+            self.db.close()
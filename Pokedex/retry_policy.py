@@ -0,0 +1,148 @@
+import asyncio, random, time
+from email.utils import parsedate_to_datetime
+
+DEFAULT_RETRIES = 4        # attempts per URL
+DEFAULT_BACKOFF = 0.5      # seconds, first backoff ceiling (doubles per attempt)
+DEFAULT_MAX_BACKOFF = 30.0
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value):
+    # Retry-After is either delta-seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# === RETRY POLICY ===
+# Exponential backoff with full jitter (sleep uniformly in [0, min(cap, base * 2^n)]),
+# a server-supplied Retry-After wins when present, and permanent client errors
+# (404 for a missing form, 400, 410...) are not retried at all.
+class RetryPolicy:
+    def __init__(self, attempts=DEFAULT_RETRIES, base=DEFAULT_BACKOFF, cap=DEFAULT_MAX_BACKOFF, seed=None):
+        self.attempts = max(1, attempts)
+        self.base = base
+        self.cap = cap
+        self.random = random.Random(seed)
+
+    @staticmethod
+    def retryable(status):
+        # None = transport error / timeout
+        return status is None or status in RETRYABLE_STATUSES or status >= 500
+
+    def delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(self.cap, retry_after)
+        return self.random.uniform(0, min(self.cap, self.base * (2 ** attempt)))
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+# === CIRCUIT BREAKER ===
+# Tracks the outcome of the last `window` requests. Once at least `min_requests`
+# were seen and the failure ratio reaches `threshold`, the circuit opens: requests
+# fail immediately (no network) for `cooldown` seconds. After that a single probe
+# is let through (half-open) while other callers wait for its verdict; success
+# closes the circuit, failure re-opens it with the cooldown doubled (up to
+# `max_cooldown`).
+class CircuitBreaker:
+    def __init__(self, threshold=0.5, window=20, min_requests=10, cooldown=15.0, max_cooldown=120.0):
+        self.threshold = threshold
+        self.window = window
+        self.min_requests = min_requests
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.opened = 0  # times the circuit opened
+        self._outcomes = []
+        self._probing = False
+
+    async def acquire(self):
+        while True:
+            if self.state == "closed":
+                return
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = "half-open"
+            if self.state == "open":
+                raise CircuitOpenError(f"circuit open, retry in {self.remaining():.1f}s")
+            if not self._probing:
+                self._probing = True
+                return
+            await asyncio.sleep(0.05)  # half-open: wait for the probe's verdict
+
+    def remaining(self):
+        if self.state == "closed":
+            return 0.0
+        return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def record(self, ok):
+        if self.state == "half-open" and self._probing:
+            self._probing = False
+            if ok:
+                self._close()
+            else:
+                self._open(self.cooldown * 2)
+            return
+        self._outcomes.append(ok)
+        if len(self._outcomes) > self.window:
+            del self._outcomes[0]
+        failures = self._outcomes.count(False)
+        if (self.state == "closed" and len(self._outcomes) >= self.min_requests
+                and failures / len(self._outcomes) >= self.threshold):
+            self._open(self.base_cooldown)
+
+    def _open(self, cooldown):
+        self.state = "open"
+        self.cooldown = min(self.max_cooldown, cooldown)
+        self.opened_at = time.monotonic()
+        self.opened += 1
+        self._outcomes.clear()
+        print(f"🔌 Circuit open: upstream failing, pausing requests for {self.cooldown:.0f}s")
+
+    def _close(self):
+        self.state = "closed"
+        self.cooldown = self.base_cooldown
+        self._outcomes.clear()
+        print("🔌 Circuit closed: upstream recovered")
+
+    async def wait_until_ready(self):
+        # Used before the dead-letter pass so it does not start into an open circuit
+        while self.state == "open" and self.remaining() > 0:
+            await asyncio.sleep(self.remaining())
+
+
+def add_retry_arguments(parser):
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help="attempts per URL for transient errors (429, 5xx, timeouts)")
+    parser.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF,
+                        help="base of the exponential backoff with full jitter, in seconds")
+    parser.add_argument("--max-backoff", type=float, default=DEFAULT_MAX_BACKOFF,
+                        help="cap for a single backoff / Retry-After sleep")
+    parser.add_argument("--breaker-threshold", type=float, default=0.5,
+                        help="failure ratio over the last 20 requests that opens the circuit (0 disables)")
+    parser.add_argument("--breaker-cooldown", type=float, default=15.0,
+                        help="seconds the circuit stays open before a probe request")
+    parser.add_argument("--dead-letter-passes", type=int, default=3,
+                        help="extra passes over failed IDs at the end of the build, each after the circuit's cooldown")
+    return parser
+
+
+def policy_from_args(args):
+    return RetryPolicy(args.retries, args.backoff, args.max_backoff)
+
+
+def breaker_from_args(args):
+    if args.breaker_threshold <= 0:
+        return None
+    return CircuitBreaker(threshold=args.breaker_threshold, cooldown=args.breaker_cooldown)
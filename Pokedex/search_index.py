@@ -0,0 +1,178 @@
+import argparse, json, math, os, re, time, unicodedata
+from collections import Counter, defaultdict
+
+from columnar_export import flatten_groups, normalize_name
+from pokedex_stream import iter_entries
+
+SEARCH_SUFFIX = ".search.json"
+FIELD_WEIGHTS = {"name": 3.0, "region_name": 1.5, "description": 1.0}
+K1, B = 1.2, 0.75
+STOPWORDS = {"a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+             "its", "of", "on", "one", "or", "that", "the", "this", "to", "was", "when", "which", "with"}
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def search_path(output_file):
+    return os.path.splitext(output_file)[0] + SEARCH_SUFFIX
+
+
+def tokenize(text):
+    # "POKéMON" -> ["pokemon"]; accents folded, stopwords dropped
+    folded = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode().lower()
+    return [t for t in TOKEN_PATTERN.findall(folded) if t not in STOPWORDS]
+
+
+def levenshtein(a, b, limit=None):
+    # Edit distance; with `limit`, anything above it is reported as limit + 1
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+# === N-GRAMS (fuzzy names) ===
+# One edit touches at most two bigrams of "$word$", so a name within distance
+# k shares at least len(ngrams(query)) - 2k of them; only those candidates get
+# a (bounded) Levenshtein check.
+def ngrams(word):
+    padded = f"${word}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+# === BUILD ===
+# BM25F-style: field term frequencies are weighted and summed into one
+# document, and each posting stores its final BM25 impact so a query is only
+# a sum over the postings of its terms.
+def build_search_index(entries):
+    docs, doc_terms = [], []
+    for entry in sorted({e["id"]: e for e in flatten_groups(entries)}.values(), key=lambda e: e["id"]):
+        tf = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(entry.get(field)):
+                tf[token] += weight
+        docs.append([entry["id"], entry["name"]])
+        doc_terms.append(tf)
+
+    lengths = [sum(tf.values()) for tf in doc_terms]
+    avgdl = sum(lengths) / max(len(lengths), 1)
+    df = Counter(term for tf in doc_terms for term in tf)
+    n = len(docs)
+    postings = defaultdict(list)
+    for doc, (tf, length) in enumerate(zip(doc_terms, lengths)):
+        norm = K1 * (1 - B + B * length / avgdl)
+        for term, freq in tf.items():
+            idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+            postings[term] += [doc, round(idf * freq * (K1 + 1) / (freq + norm), 4)]
+
+    names = defaultdict(list)
+    for doc, (_, name) in enumerate(docs):
+        names[normalize_name(name)].append(doc)
+    words = sorted(names)
+    grams = defaultdict(list)
+    for w, word in enumerate(words):
+        for gram in ngrams(word):
+            grams[gram].append(w)
+    return {"docs": docs, "postings": postings, "words": words, "names": names, "grams": grams}
+
+
+def write_search_index(entries, path):
+    data = build_search_index(entries)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+    return len(data["docs"])
+
+
+def export_search_index(output_file, source=None):
+    # Builder hook: search index next to the JSON output
+    target = search_path(output_file)
+    count = write_search_index(iter_entries(source or output_file), target)
+    print(f"🔎 Search index: {count} entries -> {target}")
+    return target
+
+
+# === QUERY ===
+# The file is only read on the first search, so importing/constructing this in
+# a service costs nothing until a lookup actually needs it.
+class SearchIndex:
+    def __init__(self, path):
+        self.path = path
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+        return self._data
+
+    def search(self, text, limit=10):
+        data = self._load()
+        scores = defaultdict(float)
+        for term in set(tokenize(text)):
+            posting = data["postings"].get(term, ())
+            for k in range(0, len(posting), 2):
+                scores[posting[k]] += posting[k + 1]
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(data["docs"][doc][0], data["docs"][doc][1], score) for doc, score in best]
+
+    def fuzzy(self, name, max_distance=None, limit=10):
+        data = self._load()
+        key = normalize_name(name)
+        if max_distance is None:
+            max_distance = 1 if len(key) <= 5 else 2
+        query_grams = ngrams(key)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(data["grams"].get(gram, ()))
+        needed = len(query_grams) - 2 * max_distance
+        candidates = shared if needed > 0 else range(len(data["words"]))
+        found = []
+        for w in candidates:
+            if needed > 0 and shared[w] < needed:
+                continue
+            word = data["words"][w]
+            distance = levenshtein(key, word, max_distance)
+            if distance <= max_distance:
+                found.append((distance, word))
+        results = []
+        for distance, word in sorted(found):
+            results += [(data["docs"][doc][0], data["docs"][doc][1], distance) for doc in data["names"][word]]
+        return results[:limit]
+
+    def match(self, text, limit=5):
+        # Exact / misspelled name first, ranked description search as fallback
+        fuzzy = self.fuzzy(text, limit=limit)
+        if fuzzy:
+            return [(i, name, "name") for i, name, _ in fuzzy]
+        return [(i, name, "text") for i, name, _ in self.search(text, limit)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query a Pokédex search index")
+    parser.add_argument("source", help="pokedex_*.json/.jsonl to index, or an existing *.search.json")
+    parser.add_argument("query", nargs="*")
+    cli = parser.parse_args()
+    path = cli.source
+    if not path.endswith(SEARCH_SUFFIX):
+        path = export_search_index(cli.source)
+    if cli.query:
+        index, text = SearchIndex(path), " ".join(cli.query)
+        started = time.perf_counter()
+        index._load()
+        loaded = time.perf_counter()
+        fuzzy, ranked = index.fuzzy(text), index.search(text, 5)
+        done = time.perf_counter()
+        for i, name, distance in fuzzy:
+            print(f"~{distance} #{i:<5} {name}")
+        for i, name, score in ranked:
+            print(f"{score:6.2f} #{i:<5} {name}")
+        print(f"⏱️ load {1000 * (loaded - started):.1f} ms, queries {1000 * (done - loaded):.3f} ms")
@@ -0,0 +1,102 @@
+import argparse, glob, json, os, re
+
+from incremental import load_source_hashes, save_source_hashes, sources_file
+from metrics import span
+from pokedex_stream import JsonlWriter, index_jsonl, jsonl_path
+
+
+# === SHARDS ===
+# `--shard k/N` builds the species with species_id % N == k - 1 (forms stay
+# with their species), so N processes or machines get disjoint, similarly sized
+# slices of every generation. Each shard has its own journal, stream and
+# source hashes: <stem>.shard-k-of-N.<ext>.
+def parse_shard(text):
+    match = re.fullmatch(r"(\d+)/(\d+)", text.strip())
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"expected k/N with 1 <= k <= N, got {text!r}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def in_shard(species_id, shard):
+    return shard is None or species_id % shard[1] == shard[0] - 1
+
+
+def shard_path(path, shard):
+    if shard is None:
+        return path
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.shard-{shard[0]}-of-{shard[1]}{ext}"
+
+
+def shard_outputs(output_file):
+    # {(k, N): shard stream} for every shard stream found next to the output
+    stem, _ = os.path.splitext(output_file)
+    found = {}
+    for path in glob.glob(glob.escape(stem) + ".shard-*-of-*.jsonl"):
+        match = re.search(r"\.shard-(\d+)-of-(\d+)\.jsonl$", path)
+        if match:
+            found[int(match.group(1)), int(match.group(2))] = path
+    return found
+
+
+# === MERGE ===
+# Combines the shard streams into <output>.jsonl sorted by ID; an ID present in
+# several shards keeps the entry from the highest k.
+# Only line offsets are indexed, entries are copied one at a time. The caller
+# then finalizes as usual, so grouping (e.g. forms by base_name) sees every
+# shard at once. Source hashes are merged the same way.
+# A shard that finishes with failed IDs keeps its journal (as does one still
+# running), so the merge refuses while any shard journal is left.
+def merge_shards(output_file, journal_file, remove=False):
+    shards = shard_outputs(output_file)
+    if not shards:
+        raise SystemExit(f"❌ No shard outputs found for {output_file}")
+    totals = {n for _, n in shards}
+    if len(totals) > 1:
+        raise SystemExit(f"❌ Shard outputs from different shard counts {sorted(totals)}; remove the stale ones")
+    total = totals.pop()
+    missing = [k for k in range(1, total + 1) if (k, total) not in shards]
+    if missing:
+        raise SystemExit(f"❌ Missing shard(s) {missing} of {total}; build them with --shard k/{total} first")
+    unfinished = [k for k in range(1, total + 1) if os.path.exists(shard_path(journal_file, (k, total)))]
+    if unfinished:
+        raise SystemExit(f"❌ Shard(s) {unfinished} of {total} still have a journal (failed IDs, or still running); "
+                         f"re-run them with --shard k/{total} until they finish cleanly")
+
+    with span("merge_shards"):
+        located, hashes = {}, {}
+        for shard in sorted(shards):
+            for i, (offset, _) in index_jsonl(shards[shard]).items():
+                located[i] = (shards[shard], offset)
+            hashes.update(load_source_hashes(shard_path(journal_file, shard)))
+
+        handles = {}
+        try:
+            with JsonlWriter(jsonl_path(output_file), mode="w") as writer:
+                for i in sorted(located):
+                    path, offset = located[i]
+                    f = handles.get(path) or handles.setdefault(path, open(path, "rb"))
+                    f.seek(offset)
+                    writer.write(json.loads(f.readline()))
+        finally:
+            for f in handles.values():
+                f.close()
+        save_source_hashes(journal_file, {i: hashes[i] for i in located if i in hashes})
+
+    print(f"🧩 Merged {total} shards into {len(located)} entries in {jsonl_path(output_file)}")
+    if remove:
+        for shard, path in shards.items():
+            for file in (path, sources_file(shard_path(journal_file, shard))):
+                if os.path.exists(file):
+                    os.remove(file)
+    return len(located)
+
+
+def add_shard_arguments(parser):
+    parser.add_argument("--shard", type=parse_shard, default=None,
+                        help="build only slice k of N (e.g. 2/4) into its own journal and partial output")
+    parser.add_argument("--merge", action="store_true",
+                        help="merge every --shard k/N partial output into the sorted, deduplicated final files")
+    parser.add_argument("--keep-shards", action="store_true",
+                        help="keep the shard partial outputs after --merge")
+    return parser
@@ -0,0 +1,161 @@
+import argparse, os, time, warnings
+from io import BytesIO
+from PIL import Image, ImageOps
+
+FORMATS = ("rgba", "la", "palette")
+
+# 256-entry lookup tables applied by Image.point (runs in C, no per-pixel Python)
+HARD_ALPHA = [0] + [255] * 255
+PALETTE_INDEX = [0] + [1] * 255
+
+
+# === OPTIONS ===
+class SilhouetteOptions:
+    __slots__ = ("format", "max_size", "soft_edges")
+
+    def __init__(self, format="rgba", max_size=None, soft_edges=False):
+        if format not in FORMATS:
+            raise ValueError(f"unknown silhouette format {format!r} (expected one of {FORMATS})")
+        if format == "palette" and soft_edges:
+            raise ValueError("palette silhouettes are 1-bit and cannot keep soft edges")
+        self.format = format
+        self.max_size = max_size
+        self.soft_edges = soft_edges
+
+
+# === RENDER ===
+# A silhouette only depends on the alpha band: take it, optionally downscale and
+# threshold it, then pair it with a constant black image. "rgba" matches the
+# files already in silhouettes/, "la" drops the redundant colour bands and
+# "palette" writes a 1-bit indexed PNG with a transparent background.
+def render_silhouette(img, options=None):
+    options = options or SilhouetteOptions()
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    alpha = img.getchannel("A")
+    if options.max_size and max(alpha.size) > options.max_size:
+        alpha.thumbnail((options.max_size, options.max_size), Image.LANCZOS)
+
+    if options.format == "palette":
+        silhouette = alpha.point(PALETTE_INDEX)
+        silhouette.putpalette([0, 0, 0, 0, 0, 0])  # L -> P, both entries black
+        silhouette.info["transparency"] = 0
+        return silhouette
+
+    if not options.soft_edges:
+        alpha = alpha.point(HARD_ALPHA)
+    black = Image.new("L", alpha.size, 0)
+    if options.format == "la":
+        return Image.merge("LA", (black, alpha))
+    return Image.merge("RGBA", (black, black, black, alpha))
+
+
+def save_silhouette(silhouette, output_path):
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if silhouette.mode == "P":
+        silhouette.save(output_path, optimize=True, transparency=0, bits=1)
+    else:
+        silhouette.save(output_path, optimize=True)
+    return output_path
+
+
+def silhouette_from_bytes(image_bytes, output_path, options=None):
+    with Image.open(BytesIO(image_bytes)) as img:
+        return save_silhouette(render_silhouette(img, options), output_path)
+
+
+# === BATCH API ===
+# jobs: iterable of (source, output_path) where source is PNG bytes or a file path.
+# Returns the written path (or None on failure) for each job, in order.
+def generate_batch(jobs, options=None):
+    results = []
+    for source, output_path in jobs:
+        try:
+            if isinstance(source, (bytes, bytearray)):
+                results.append(silhouette_from_bytes(source, output_path, options))
+            else:
+                with Image.open(source) as img:
+                    results.append(save_silhouette(render_silhouette(img, options), output_path))
+        except Exception as e:
+            print(f"⚠️ Silhouette error for {output_path}: {e}")
+            results.append(None)
+    return results
+
+
+# === CLI HELPERS shared by the builders ===
+def add_silhouette_arguments(parser):
+    parser.add_argument("--silhouette-format", choices=FORMATS, default="rgba",
+                        help="rgba (default), la (grey+alpha) or palette (1-bit, smallest)")
+    parser.add_argument("--silhouette-size", type=int, default=None,
+                        help="downscale silhouettes so the longest side is at most this many pixels")
+    return parser
+
+
+def options_from_args(args, soft_edges=False):
+    return SilhouetteOptions(args.silhouette_format, args.silhouette_size,
+                             soft_edges and args.silhouette_format != "palette")
+
+
+# === BENCHMARK: engine vs. the previous implementations ===
+def _legacy_pixel_loop(img):
+    # the old create_silhouette body from generate_full_pokedex.py
+    img = img.convert("RGBA")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        data = img.getdata()
+    new_data = []
+    for item in data:
+        if item[3] > 0:
+            new_data.append((0, 0, 0, 255))
+        else:
+            new_data.append((0, 0, 0, 0))
+    img.putdata(new_data)
+    return img
+
+
+def _legacy_colorize(img):
+    img = img.convert("RGBA")
+    black = ImageOps.colorize(ImageOps.grayscale(img), black="black", white="black")
+    black.putalpha(img.getchannel("A"))
+    return black
+
+
+def benchmark(paths, repeat=3):
+    images = []
+    for path in paths:
+        with Image.open(path) as img:
+            images.append(img.convert("RGBA"))
+    candidates = {
+        "legacy pixel loop": _legacy_pixel_loop,
+        "legacy colorize": _legacy_colorize,
+        "engine rgba": lambda img: render_silhouette(img, SilhouetteOptions("rgba")),
+        "engine palette": lambda img: render_silhouette(img, SilhouetteOptions("palette")),
+    }
+    results = {}
+    for label, fn in candidates.items():
+        best = min(_timed(fn, images) for _ in range(repeat))
+        results[label] = best
+        print(f"⏱️ {label:<18} {best * 1000 / len(images):8.2f} ms/image")
+    base = results["legacy pixel loop"]
+    print(f"🚀 engine rgba is {base / results['engine rgba']:.1f}x faster than the pixel loop")
+    return results
+
+
+def _timed(fn, images):
+    start = time.perf_counter()
+    for img in images:
+        fn(img)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark silhouette rendering")
+    parser.add_argument("images", nargs="*", help="PNG files (defaults to the first N in silhouettes/)")
+    parser.add_argument("-n", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=3)
+    cli = parser.parse_args()
+    files = cli.images or sorted(os.path.join("silhouettes", f) for f in os.listdir("silhouettes")
+                                 if f.endswith(".png"))[:cli.n]
+    benchmark(files, cli.repeat)
@@ -0,0 +1,191 @@
+import asyncio, os, time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+from metrics import count, observe, span
+from silhouette_engine import add_silhouette_arguments, options_from_args, silhouette_from_bytes
+from silhouette_store import SILHOUETTE_DIR, SilhouetteStore
+
+
+# Runs inside a worker process (must stay a top-level, picklable function)
+def render_job(image_bytes, output_path, options):
+    return silhouette_from_bytes(image_bytes, output_path, options)
+
+
+class StageStats:
+    __slots__ = ("items", "failed", "bytes", "busy", "first", "last")
+
+    def __init__(self):
+        self.items = self.failed = self.bytes = 0
+        self.busy = 0.0
+        self.first = self.last = None
+
+    def record(self, started, finished, nbytes=0, ok=True):
+        self.items += 1
+        self.failed += 0 if ok else 1
+        self.bytes += nbytes
+        self.busy += finished - started
+        self.first = started if self.first is None else min(self.first, started)
+        self.last = finished if self.last is None else max(self.last, finished)
+
+    def throughput(self):
+        span = (self.last - self.first) if self.items and self.last > self.first else 0
+        return self.items / span if span else 0.0
+
+
+# === SILHOUETTE PIPELINE ===
+# Artwork downloads stay on the event loop (network stage); decoding/encoding
+# PNGs happens in a ProcessPoolExecutor (image stage) fed through a bounded
+# queue. A download slot is only granted while there is room downstream, so
+# artwork bytes in flight are bounded and a slow image stage throttles the
+# artwork fetches instead of piling up memory. `silhouette()` goes through the
+# content-addressed store: known artwork skips the download, identical artwork
+# is rendered once (concurrent requests for the same blob share one render).
+class SilhouettePipeline:
+    def __init__(self, options, workers=None, queue_size=64, store=None):
+        self.options = options
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.store = store or SilhouetteStore(SILHOUETTE_DIR, options)
+        self._inflight = {}  # blob key -> render task
+        self.fetch_stats = StageStats()
+        self.image_stats = StageStats()
+        self.queue_waits = 0.0
+
+    async def __aenter__(self):
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._slots = asyncio.Semaphore(self.queue_size + self.workers)
+        self._consumers = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.queue.join()
+        for consumer in self._consumers:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self.pool.shutdown()
+        self.store.save()
+        print(self.report())
+        print(self.store.summary())
+
+    async def _fetch(self, engine, image_url):
+        started = time.perf_counter()
+        with span("silhouette_fetch"):
+            image_bytes = await engine.fetch_bytes(image_url)
+        self.fetch_stats.record(started, time.perf_counter(), len(image_bytes or b""), bool(image_bytes))
+        return image_bytes
+
+    @asynccontextmanager
+    async def _slot(self):
+        # The slots are where backpressure is felt (the queue itself never fills:
+        # it has room for every slot), so this wait is what gets measured
+        waiting = time.perf_counter()
+        async with self._slots:
+            self.queue_waits += time.perf_counter() - waiting
+            observe("silhouette_backpressure", time.perf_counter() - waiting)
+            yield
+
+    async def _submit(self, image_bytes, output_path):
+        result = asyncio.get_running_loop().create_future()
+        await self.queue.put((image_bytes, output_path, result))
+        return await result
+
+    async def _render_blob(self, image_bytes, blob):
+        # Render next to the blob and rename, so a blob path only ever holds a complete PNG
+        part = blob[:-len(".png")] + f".{os.getpid()}.part.png"
+        if not await self._submit(image_bytes, part):
+            return None
+        os.replace(part, blob)
+        return blob
+
+    async def render(self, engine, image_url, output_path):
+        async with self._slot():
+            image_bytes = await self._fetch(engine, image_url)
+            if not image_bytes:
+                return None
+            return await self._submit(image_bytes, output_path)
+
+    async def silhouette(self, engine, image_url, name, lazy=None):
+        # Path of the Pokémon's silhouette alias, or None if it could not be made
+        store = self.store
+        if path := store.lookup(name, image_url):
+            store.stats["hits"] += 1
+            count("silhouette_store", result="hit")
+            return path
+        if store.lazy if lazy is None else lazy:
+            count("silhouette_store", result="deferred")
+            return store.defer(name, image_url)
+        key = store.source_key(image_url)
+        if key is None:
+            async with self._slot():
+                image_bytes = await self._fetch(engine, image_url)
+                if not image_bytes:
+                    return None
+                key = store.key(image_bytes)
+                blob = store.blob_path(key)
+                if not os.path.exists(blob):
+                    task = self._inflight.get(key)
+                    if task is None:
+                        task = self._inflight[key] = asyncio.ensure_future(self._render_blob(image_bytes, blob))
+                        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+                        store.stats["rendered"] += 1
+                        count("silhouette_store", result="rendered")
+                    else:
+                        store.stats["shared"] += 1
+                        count("silhouette_store", result="shared")
+                    if not await task:
+                        return None
+                else:
+                    store.stats["shared"] += 1
+                    count("silhouette_store", result="shared")
+        else:
+            store.stats["shared"] += 1
+            count("silhouette_store", result="shared")
+        return store.link(name, image_url, key)
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            image_bytes, output_path, result = await self.queue.get()
+            started = time.perf_counter()
+            try:
+                with span("silhouette_render"):
+                    path = await loop.run_in_executor(self.pool, render_job, image_bytes, output_path, self.options)
+                result.set_result(path)
+                self.image_stats.record(started, time.perf_counter())
+                count("silhouettes_rendered")
+            except Exception as e:
+                print(f"⚠️ Silhouette error for {output_path}: {e}")
+                result.set_result(None)
+                self.image_stats.record(started, time.perf_counter(), ok=False)
+                count("silhouette_failures")
+            finally:
+                self.queue.task_done()
+
+    def report(self):
+        f, i = self.fetch_stats, self.image_stats
+        return (f"📊 Artwork fetch stage: {f.items} downloads ({f.failed} failed), {f.bytes / 1e6:.1f} MB, "
+                f"{f.throughput():.1f}/s | image stage ({self.workers} procs): {i.items} rendered "
+                f"({i.failed} failed), {i.throughput():.1f}/s, {self.queue_waits:.1f}s blocked on backpressure")
+
+
+# === CLI HELPERS shared by the builders ===
+def add_pipeline_arguments(parser):
+    add_silhouette_arguments(parser)
+    parser.add_argument("--image-workers", type=int, default=None,
+                        help="silhouette worker processes (defaults to the CPU count)")
+    parser.add_argument("--image-queue", type=int, default=64,
+                        help="bounded queue size between artwork fetches and image workers")
+    parser.add_argument("--silhouette-dir", default=SILHOUETTE_DIR,
+                        help="silhouette store: blobs/ keyed by artwork hash, one alias per Pokémon, manifest.json")
+    parser.add_argument("--lazy-silhouettes", action="store_true",
+                        help="only record each Pokémon's artwork in the manifest; render later with "
+                             "`python silhouette_store.py materialize` or on demand")
+    return parser
+
+
+def pipeline_from_args(args, soft_edges=False):
+    options = options_from_args(args, soft_edges)
+    store = SilhouetteStore(args.silhouette_dir, options, lazy=args.lazy_silhouettes)
+    return SilhouettePipeline(options, args.image_workers, args.image_queue, store)
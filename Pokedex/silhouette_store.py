@@ -0,0 +1,250 @@
+import argparse, asyncio, copy, hashlib, json, os, re, shutil, unicodedata
+
+from file_lock import locked
+
+SILHOUETTE_DIR = "silhouettes"
+MANIFEST = "manifest.json"
+BLOB_DIR = "blobs"
+LEGACY_SUFFIX = "_silhouette"  # generate_full_pokedex.py used {name}_silhouette.png
+
+
+def slug(name):
+    # "Charizard Mega X", "charizard-mega-x" and "charizard_mega_x" all map to charizard_mega_x
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+    return re.sub(r"[^a-z0-9]+", "_", text).strip("_")
+
+
+def options_tag(options):
+    # "" for full-size soft-edged RGBA (what silhouettes/ already holds), e.g. "hard" or "palette_256px" otherwise
+    if options is None:
+        return ""
+    parts = [] if options.format == "rgba" else [options.format]
+    if options.max_size:
+        parts.append(f"{options.max_size}px")
+    if not options.soft_edges and options.format != "palette":
+        parts.append("hard")
+    return "_".join(parts)
+
+
+# === SILHOUETTE STORE ===
+# Blobs live in silhouettes/blobs/<2 hex>/<hash>.png, keyed by a hash of the
+# source artwork bytes plus the render options, so identical artwork (forms
+# sharing their base art, re-uploads under another URL) is decoded and stored
+# once. Every Pokémon/form gets a stable alias, silhouettes/<slug>.png
+# (<slug>.<tag>.png for non-default options), hardlinked to its blob. The
+# manifest maps each alias to its artwork URL and blob; a blob of None means
+# the silhouette is pending (lazy builds) and is rendered on demand.
+class SilhouetteStore:
+    def __init__(self, root=SILHOUETTE_DIR, options=None, lazy=False):
+        self.root = root
+        self.options = options
+        self.tag = options_tag(options)
+        self.lazy = lazy
+        self.manifest_file = os.path.join(root, MANIFEST)
+        self.manifest = self._load()
+        self._base = copy.deepcopy(self.manifest)  # as loaded: save() writes back only what changed since
+        self.stats = {"hits": 0, "adopted": 0, "shared": 0, "rendered": 0, "pending": 0}
+
+    def _load(self):
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {"version": 1, "pokemon": {}, "sources": {}}
+
+    def save(self):
+        # Re-read under a lock so builders and shards sharing the directory do not
+        # drop each other's aliases; only entries changed by this process are written
+        os.makedirs(self.root, exist_ok=True)
+        with locked(self.manifest_file):
+            current = self._load()
+            for section in ("pokemon", "sources"):
+                base = self._base[section]
+                current[section].update({k: v for k, v in self.manifest[section].items() if base.get(k) != v})
+            self.manifest = current
+            self._base = copy.deepcopy(current)
+            with open(self.manifest_file + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(current, f, indent=0, sort_keys=True)
+            os.replace(self.manifest_file + ".tmp", self.manifest_file)
+
+    # --- paths / keys ---
+    def alias(self, name):
+        return slug(name) + (f".{self.tag}" if self.tag else "")
+
+    def alias_path(self, name):
+        return os.path.join(self.root, self.alias(name) + ".png")
+
+    def blob_path(self, key):
+        return os.path.join(self.root, BLOB_DIR, key[:2], key + ".png")
+
+    def key(self, image_bytes):
+        return hashlib.blake2b(self.tag.encode() + b"\0" + image_bytes, digest_size=16).hexdigest()
+
+    def source_key(self, url):
+        blob = self.manifest["sources"].get(f"{self.tag} {url}")
+        return blob if blob and os.path.exists(self.blob_path(blob)) else None
+
+    # --- lookups ---
+    def lookup(self, name, url):
+        # Alias already built from this artwork (or migrated with an unknown source)
+        entry = self.manifest["pokemon"].get(self.alias(name))
+        path = self.alias_path(name)
+        if entry is None and os.path.exists(path):
+            return self.adopt(name, url, path)
+        if entry and entry.get("blob") and entry.get("artwork") in (None, url) and os.path.exists(path):
+            return path
+        return None
+
+    def has(self, path):
+        # Present on disk, or pending in a lazy build
+        if not path:
+            return False
+        if os.path.exists(path):
+            return True
+        entry = self.manifest["pokemon"].get(os.path.splitext(os.path.basename(path))[0])
+        return bool(entry and entry.get("artwork"))
+
+    def pending(self):
+        return {alias: entry["artwork"] for alias, entry in self.manifest["pokemon"].items()
+                if not entry.get("blob") and entry.get("artwork") and alias.partition(".")[2] == self.tag}
+
+    # --- updates ---
+    def adopt(self, name, url, path):
+        # A file already at the alias (written before the store existed, `migrate`
+        # not run) becomes its blob as-is: hardlinked, never re-rendered or rewritten
+        with open(path, "rb") as f:
+            key = self.key(f.read())
+        blob = self.blob_path(key)
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            try:
+                os.link(path, blob)
+            except OSError:
+                shutil.copyfile(path, blob)
+        self.manifest["pokemon"][self.alias(name)] = {"artwork": url, "blob": key}
+        self.stats["adopted"] += 1
+        return path
+
+    def defer(self, name, url):
+        alias = self.alias(name)
+        entry = self.manifest["pokemon"].get(alias)
+        if not entry or entry.get("artwork") != url:
+            self.manifest["pokemon"][alias] = {"artwork": url, "blob": None}
+        self.stats["pending"] += 1
+        return self.alias_path(name)
+
+    def link(self, name, url, key):
+        path = self.alias_path(name)
+        link_file(self.blob_path(key), path)
+        self.manifest["pokemon"][self.alias(name)] = {"artwork": url, "blob": key}
+        if url:
+            self.manifest["sources"][f"{self.tag} {url}"] = key
+        return path
+
+    def summary(self):
+        s = self.stats
+        return (f"🖤 Silhouette store: {s['rendered']} rendered, {s['shared']} shared an existing blob, "
+                f"{s['hits']} already linked ({s['adopted']} adopted from existing files), {s['pending']} deferred")
+
+
+def link_file(blob, path):
+    # Hardlink the alias to its blob (one copy on disk); copy where links are not supported
+    if os.path.exists(path):
+        if os.path.samefile(blob, path):
+            return
+        os.remove(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    try:
+        os.link(blob, path)
+    except OSError:
+        shutil.copyfile(blob, path)
+
+
+def blob_stats(root):
+    blobs = [os.path.join(d, f) for d, _, files in os.walk(os.path.join(root, BLOB_DIR)) for f in files]
+    return len(blobs), sum(os.path.getsize(b) for b in blobs)
+
+
+# === MIGRATION ===
+# Moves the PNGs written by the old per-script naming schemes into blobs keyed
+# by their own content (the artwork they came from is unknown) and hardlinks
+# every old file name back to its blob, so existing outputs keep resolving.
+# Byte-identical files collapse into one blob.
+def migrate(root=SILHOUETTE_DIR, dry_run=False):
+    store = SilhouetteStore(root)
+    files = sorted(f for f in os.listdir(root) if f.endswith(".png") and os.path.isfile(os.path.join(root, f)))
+    seen, saved = {}, 0
+    for file in files:
+        path = os.path.join(root, file)
+        with open(path, "rb") as f:
+            body = f.read()
+        key = store.key(body)
+        if key in seen:
+            saved += len(body)
+        seen.setdefault(key, path)
+        name = os.path.splitext(file)[0]
+        if name.endswith(LEGACY_SUFFIX):
+            name = name[:-len(LEGACY_SUFFIX)]
+        if dry_run:
+            continue
+        blob = store.blob_path(key)
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            shutil.copyfile(path, blob)
+        link_file(blob, path)
+        store.manifest["pokemon"].setdefault(slug(name), {"artwork": None, "blob": key})
+    if not dry_run:
+        store.save()
+    print(f"📦 {'Would migrate' if dry_run else 'Migrated'} {len(files)} silhouettes into {len(seen)} blobs "
+          f"({saved / 1e6:.1f} MB of duplicates)")
+
+
+# === ON-DEMAND RENDERING ===
+async def materialize(args):
+    # Renders every silhouette a lazy build deferred (or only `names`)
+    from fetch_engine import engine_from_args
+    from silhouette_pipeline import pipeline_from_args
+
+    async with engine_from_args(args) as engine, pipeline_from_args(args, not args.hard_edges) as pipeline:
+        store = pipeline.store
+        todo = store.pending()
+        if args.names:
+            wanted = {store.alias(n) for n in args.names}
+            todo = {alias: url for alias, url in todo.items() if alias in wanted}
+        print(f"🖤 Materializing {len(todo)} deferred silhouettes")
+        paths = await asyncio.gather(*(pipeline.silhouette(engine, url, alias.split(".")[0], lazy=False)
+                                       for alias, url in todo.items()))
+        print(f"🖤 {sum(1 for p in paths if p)} silhouettes written, {sum(1 for p in paths if not p)} failed")
+
+
+def main():
+    from fetch_engine import add_engine_arguments
+    from silhouette_pipeline import add_pipeline_arguments
+
+    parser = argparse.ArgumentParser(description="Content-addressed silhouette store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    mig = sub.add_parser("migrate", help="move legacy silhouette files into the blob store")
+    mig.add_argument("--dir", default=SILHOUETTE_DIR)
+    mig.add_argument("--dry-run", action="store_true")
+    mat = sub.add_parser("materialize", help="render silhouettes deferred by --lazy-silhouettes builds")
+    mat.add_argument("names", nargs="*", help="only these Pokémon (default: everything pending)")
+    mat.add_argument("--hard-edges", action="store_true", help="generate_full_pokedex.py's thresholded variant")
+    add_engine_arguments(mat)
+    add_pipeline_arguments(mat)
+    stats = sub.add_parser("stats", help="blob / alias counts and disk use")
+    stats.add_argument("--dir", default=SILHOUETTE_DIR)
+    cli = parser.parse_args()
+
+    if cli.command == "migrate":
+        migrate(cli.dir, cli.dry_run)
+    elif cli.command == "materialize":
+        asyncio.run(materialize(cli))
+    else:
+        store = SilhouetteStore(cli.dir)
+        blobs, size = blob_stats(cli.dir)
+        pokemon = store.manifest["pokemon"]
+        print(f"📦 {len(pokemon)} aliases -> {blobs} blobs ({size / 1e6:.1f} MB), "
+              f"{sum(1 for e in pokemon.values() if not e.get('blob'))} pending")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+from itertools import combinations_with_replacement
+from types import MappingProxyType
+import numpy as np
+
+TYPES = ("Normal", "Fire", "Water", "Electric", "Grass", "Ice", "Fighting", "Poison", "Ground",
+         "Flying", "Psychic", "Bug", "Rock", "Ghost", "Dragon", "Dark", "Steel", "Fairy")
+TYPE_INDEX = {name: i for i, name in enumerate(TYPES)}
+
+# === TYPE CHART (attacker -> defender multipliers that differ from 1x) ===
+_CHART = {
+    "Normal": {"Rock": 0.5, "Ghost": 0, "Steel": 0.5},
+    "Fire": {"Fire": 0.5, "Water": 0.5, "Grass": 2, "Ice": 2, "Bug": 2, "Rock": 0.5, "Dragon": 0.5, "Steel": 2},
+    "Water": {"Fire": 2, "Water": 0.5, "Grass": 0.5, "Ground": 2, "Rock": 2, "Dragon": 0.5},
+    "Electric": {"Water": 2, "Electric": 0.5, "Grass": 0.5, "Ground": 0, "Flying": 2, "Dragon": 0.5},
+    "Grass": {"Fire": 0.5, "Water": 2, "Grass": 0.5, "Poison": 0.5, "Ground": 2, "Flying": 0.5, "Bug": 0.5,
+              "Rock": 2, "Dragon": 0.5, "Steel": 0.5},
+    "Ice": {"Fire": 0.5, "Water": 0.5, "Grass": 2, "Ice": 0.5, "Ground": 2, "Flying": 2, "Dragon": 2, "Steel": 0.5},
+    "Fighting": {"Normal": 2, "Ice": 2, "Poison": 0.5, "Flying": 0.5, "Psychic": 0.5, "Bug": 0.5, "Rock": 2,
+                 "Ghost": 0, "Dark": 2, "Steel": 2, "Fairy": 0.5},
+    "Poison": {"Grass": 2, "Poison": 0.5, "Ground": 0.5, "Rock": 0.5, "Ghost": 0.5, "Steel": 0, "Fairy": 2},
+    "Ground": {"Fire": 2, "Electric": 2, "Grass": 0.5, "Poison": 2, "Flying": 0, "Bug": 0.5, "Rock": 2, "Steel": 2},
+    "Flying": {"Electric": 0.5, "Grass": 2, "Fighting": 2, "Bug": 2, "Rock": 0.5, "Steel": 0.5},
+    "Psychic": {"Fighting": 2, "Poison": 2, "Psychic": 0.5, "Dark": 0, "Steel": 0.5},
+    "Bug": {"Fire": 0.5, "Grass": 2, "Fighting": 0.5, "Poison": 0.5, "Flying": 0.5, "Psychic": 2, "Ghost": 0.5,
+            "Dark": 2, "Steel": 0.5, "Fairy": 0.5},
+    "Rock": {"Fire": 2, "Ice": 2, "Fighting": 0.5, "Ground": 0.5, "Flying": 2, "Bug": 2, "Steel": 0.5},
+    "Ghost": {"Normal": 0, "Psychic": 2, "Ghost": 2, "Dark": 0.5},
+    "Dragon": {"Dragon": 2, "Steel": 0.5, "Fairy": 0},
+    "Dark": {"Fighting": 0.5, "Psychic": 2, "Ghost": 2, "Dark": 0.5, "Fairy": 0.5},
+    "Steel": {"Fire": 0.5, "Water": 0.5, "Electric": 0.5, "Ice": 2, "Rock": 2, "Steel": 0.5, "Fairy": 2},
+    "Fairy": {"Fire": 0.5, "Fighting": 2, "Poison": 0.5, "Dragon": 2, "Dark": 2, "Steel": 0.5},
+}
+
+# MATRIX[attacker, defender]
+MATRIX = np.ones((len(TYPES), len(TYPES)), dtype=np.float32)
+for _attacker, _row in _CHART.items():
+    for _defender, _mult in _row.items():
+        MATRIX[TYPE_INDEX[_attacker], TYPE_INDEX[_defender]] = _mult
+
+# === PRECOMPUTED COMBINATION TABLES (18 single + 153 dual = 171 rows) ===
+# COMBOS[k] is a (first, second) index pair, second == first for single types.
+COMBOS = list(combinations_with_replacement(range(len(TYPES)), 2))
+COMBO_INDEX = {pair: k for k, pair in enumerate(COMBOS)}
+_first = np.array([a for a, _ in COMBOS])
+_second = np.array([b for _, b in COMBOS])
+_is_dual = _first != _second
+
+# DEFENSE[k, attacker]: damage multiplier of each attacking type against combo k
+DEFENSE = MATRIX[:, _first].T * np.where(_is_dual[:, None], MATRIX[:, _second].T, 1.0)
+# OFFENSE[k, defender]: best multiplier combo k's own types (STAB) get against each type
+OFFENSE = np.maximum(MATRIX[_first], MATRIX[_second])
+
+BUCKETS = {"0x": 0.0, "0.25x": 0.25, "0.5x": 0.5, "2x": 2.0, "4x": 4.0}
+
+
+def combo_index(types):
+    idx = sorted(TYPE_INDEX[t] for t in types if t in TYPE_INDEX)
+    if not idx:
+        return None
+    return COMBO_INDEX[(idx[0], idx[-1])]
+
+
+def _names(mask):
+    return tuple(sorted(TYPES[i] for i in np.flatnonzero(mask)))
+
+
+# Shared by every lookup, so immutable: read-only mappings of tuples
+_MATCHUPS = [MappingProxyType({label: _names(DEFENSE[k] == mult) for label, mult in BUCKETS.items()})
+             for k in range(len(COMBOS))]
+_NO_MATCHUPS = MappingProxyType({label: () for label in BUCKETS})
+_WEAKNESSES = [_names(DEFENSE[k] > 1) for k in range(len(COMBOS))]
+_STRENGTHS = [_names(OFFENSE[k] > 1) for k in range(len(COMBOS))]
+
+
+# === PER-ENTRY LOOKUPS (one table read each) ===
+def matchups(types):
+    k = combo_index(types)
+    return _MATCHUPS[k] if k is not None else _NO_MATCHUPS
+
+
+def weaknesses(types):
+    k = combo_index(types)
+    return list(_WEAKNESSES[k]) if k is not None else []
+
+
+def strengths(types):
+    k = combo_index(types)
+    return list(_STRENGTHS[k]) if k is not None else []
+
+
+# === BULK LOOKUPS ===
+# Extra all-1x row for entries without a known type
+_DEFENSE_LOOKUP = np.vstack([DEFENSE, np.ones((1, len(TYPES)), dtype=DEFENSE.dtype)])
+_NEUTRAL = len(COMBOS)
+
+
+def combo_indices(type_lists):
+    return np.array([k if (k := combo_index(types)) is not None else _NEUTRAL for types in type_lists],
+                    dtype=np.int64)
+
+
+def defensive_multipliers(type_lists):
+    # (n, 18) multipliers for many Pokémon at once; column order follows TYPES
+    return _DEFENSE_LOOKUP[combo_indices(type_lists)]
+
+
+def multipliers_against(type_lists, attacker):
+    # (n,) multiplier of one attacking type against each Pokémon
+    return defensive_multipliers(type_lists)[:, TYPE_INDEX[attacker]]